@@ -1,5 +1,7 @@
 import streamlit as st
-from utils.database import get_snowflake_connection
+import pandas as pd
+from utils.database import get_connection_pool, get_database_backend
+from utils.query_metrics import query_metrics
 from utils.theme import init_theme, toggle_theme, apply_theme_styles
 import streamlit.components.v1 as components
 
@@ -31,9 +33,9 @@ st.markdown('<div class="sub-header">AI-Powered Property Inspection Platform</di
 
 # Connection test with animation
 with st.spinner("🔄 Connecting to database..."):
-    conn = get_snowflake_connection()
-    if conn:
-        st.success("Connected to Snowflake successfully!")
+    pool = get_connection_pool()
+    if pool:
+        st.success(f"Connected to {get_database_backend().label} successfully!")
         
         # Trigger confetti effect
         if 'confetti_shown' not in st.session_state:
@@ -42,6 +44,26 @@ with st.spinner("🔄 Connecting to database..."):
     else:
         st.error("Failed to connect. Please check configuration.")
 
+# Query timings recorded by every session on this server
+with st.sidebar.expander("⏱️ Query Performance"):
+    metrics_summary = query_metrics.get_summary()
+    if metrics_summary:
+        metrics_df = pd.DataFrame(metrics_summary)
+        st.dataframe(
+            metrics_df[['statement', 'calls', 'p50_ms', 'p95_ms', 'avg_rows', 'pages']],
+            hide_index=True, use_container_width=True
+        )
+        slow_queries = query_metrics.get_slow_queries()
+        st.caption(f"{len(slow_queries)} slow queries (≥ {query_metrics.slow_query_ms:.0f} ms)")
+        for entry in slow_queries[:5]:
+            st.caption(f"🐢 {entry['statement']} - {entry['ms']} ms, {entry['rows']} rows ({entry['page'] or 'app'})")
+        st.download_button(
+            "Export CSV", metrics_df.to_csv(index=False), file_name="query_metrics.csv",
+            mime="text/csv", use_container_width=True
+        )
+    else:
+        st.caption("No queries recorded yet")
+
 st.markdown("---")
 
 # Introduction with fade-in effect
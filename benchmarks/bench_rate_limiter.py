@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of RateLimiter per-call cost
+
+Fills the window with N live requests and times try_acquire,
+get_remaining_requests and get_reset_time. The deque limiter should stay
+flat as N grows; the previous list-rebuilding limiter (reproduced below
+for comparison) grows linearly
+
+    python benchmarks/bench_rate_limiter.py
+"""
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limiter import RateLimiter
+
+WINDOW_SIZES = (10, 100, 1000, 10000)
+CALLS = 2000
+
+
+class ListRateLimiter:
+    """The previous implementation: rebuilds a list of datetimes on every check"""
+
+    def __init__(self, max_requests_per_minute=10):
+        self.max_requests = max_requests_per_minute
+        self.time_window = 60
+        self.request_times = []
+
+    def can_make_request(self):
+        current_time = datetime.now()
+        self.request_times = [
+            t for t in self.request_times if current_time - t < timedelta(seconds=self.time_window)
+        ]
+        return len(self.request_times) < self.max_requests
+
+    def record_request(self):
+        self.request_times.append(datetime.now())
+
+    def try_acquire(self):
+        if self.can_make_request():
+            self.record_request()
+            return True
+        return False
+
+    def get_remaining_requests(self):
+        self.can_make_request()
+        return self.max_requests - len(self.request_times)
+
+    def get_reset_time(self):
+        if not self.request_times:
+            return 0
+        reset_time = min(self.request_times) + timedelta(seconds=self.time_window)
+        return max(0, (reset_time - datetime.now()).total_seconds())
+
+
+def per_call_us(limiter, method):
+    return timeit.timeit(getattr(limiter, method), number=CALLS) / CALLS * 1e6
+
+
+def main():
+    print(f"{'limiter':<10} {'live requests':>13} {'try_acquire':>12} {'remaining':>10} {'reset_time':>11}  (us/call)")
+    for name, cls in (('deque', RateLimiter), ('list', ListRateLimiter)):
+        for size in WINDOW_SIZES:
+            # Room for the timed try_acquire calls, so each one records a request
+            limiter = cls(max_requests_per_minute=size + CALLS + 1)
+            for _ in range(size):
+                limiter.record_request()
+            timings = [per_call_us(limiter, m) for m in ('try_acquire', 'get_remaining_requests', 'get_reset_time')]
+            print(f"{name:<10} {size:>13} {timings[0]:>12.2f} {timings[1]:>10.2f} {timings[2]:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark of the seller portfolio lookup
+
+Seeds sellers with 1 to 50 listings (3 gallery photos each) in a temporary
+embedded SQLite database, then compares database round trips and time of
+the previous per-listing COUNT(*) loop with get_seller_portfolio's single
+grouped query
+
+    python benchmarks/bench_seller_portfolio.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+LISTING_COUNTS = (1, 10, 50)
+PHOTOS_PER_LISTING = 3
+
+_tmp = tempfile.TemporaryDirectory()
+os.environ['NIVAASIKA_DB_BACKEND'] = 'sqlite'
+os.environ['NIVAASIKA_SQLITE_PATH'] = os.path.join(_tmp.name, 'bench.db')
+
+from utils.database import execute_query, get_connection_pool, get_seller_portfolio
+from utils.query_metrics import query_metrics
+
+
+def seed(seller_email, listings):
+    with get_connection_pool().connection() as conn:
+        for i in range(listings):
+            property_id = f"BENCH_{seller_email.split('@')[0]}_{i}"
+            conn.execute(
+                "INSERT INTO PROPERTIES (PROPERTY_ID, SELLER_NAME, SELLER_EMAIL, PROPERTY_ADDRESS, CITY, "
+                "PROPERTY_TYPE, PRICE, STATUS) VALUES (?, 'Bench Seller', ?, ?, 'Pune', 'Apartment', 5000000, 'pending')",
+                (property_id, seller_email, f"{i} Bench Road")
+            )
+            conn.executemany(
+                "INSERT INTO PROPERTY_GALLERY (GALLERY_ID, PROPERTY_ID, IMAGE_NAME, IMAGE_ORDER) VALUES (?, ?, ?, ?)",
+                [(f"{property_id}_IMG_{n}", property_id, f"photo_{n}.jpg", n) for n in range(PHOTOS_PER_LISTING)]
+            )
+        conn.commit()
+
+
+def per_listing_counts(seller_email):
+    """The previous approach: list the seller's properties, then one COUNT(*) per listing"""
+    result = execute_query(
+        "SELECT property_id FROM PROPERTIES WHERE seller_email = %(seller_email)s",
+        {'seller_email': seller_email}
+    )
+    return {
+        property_id: execute_query(
+            "SELECT COUNT(*) FROM PROPERTY_GALLERY WHERE property_id = %(property_id)s",
+            {'property_id': property_id}
+        )['data'][0][0]
+        for (property_id,) in result['data']
+    }
+
+
+def measure(fn, seller_email):
+    query_metrics.reset()
+    started = time.perf_counter()
+    fn(seller_email)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    round_trips = sum(row['calls'] for row in query_metrics.get_summary())
+    return round_trips, elapsed_ms
+
+
+def main():
+    print(f"{'listings':>8} {'per-listing trips':>18} {'ms':>7} {'portfolio trips':>16} {'ms':>7}")
+    for listings in LISTING_COUNTS:
+        seller_email = f"seller{listings}@bench.test"
+        seed(seller_email, listings)
+        portfolio = get_seller_portfolio(seller_email)
+        assert all(row[-1] == PHOTOS_PER_LISTING for row in portfolio['data'])
+
+        old_trips, old_ms = measure(per_listing_counts, seller_email)
+        new_trips, new_ms = measure(get_seller_portfolio, seller_email)
+        print(f"{listings:>8} {old_trips:>18} {old_ms:>7.1f} {new_trips:>16} {new_ms:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
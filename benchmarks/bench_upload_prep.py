@@ -0,0 +1,103 @@
+"""
+Benchmark of image preprocessing before Gemini uploads
+
+Sends synthetic phone photos through the real SDK to a local fake Gemini
+server, once as the original bytes and once after prepare_for_upload, and
+reports upload size and end-to-end time. The fake server reads the body
+at --bandwidth-mbps to stand in for a real uplink
+
+    python benchmarks/bench_upload_prep.py --images 4 --bandwidth-mbps 20
+"""
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image
+
+from utils.gemini_client import GeminiClient, GenaiTransport
+from utils.image_processing import prepare_for_upload
+
+FAKE_RESPONSE = json.dumps({
+    'candidates': [{
+        'content': {'parts': [{'text': '{"defects": []}'}], 'role': 'model'},
+        'finishReason': 'STOP',
+        'index': 0
+    }]
+}).encode('utf-8')
+
+
+def make_fake_server(bandwidth_mbps):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers['Content-Length'])
+            self.rfile.read(length)
+            time.sleep(length * 8 / (bandwidth_mbps * 1e6))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(FAKE_RESPONSE)))
+            self.end_headers()
+            self.wfile.write(FAKE_RESPONSE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_photo(seed, size=(4032, 3024)):
+    """A 12 MP JPEG with enough texture to compress like a real photo"""
+    noise = Image.effect_noise(size, 40 + seed).convert('RGB')
+    gradient = Image.linear_gradient('L').resize(size).convert('RGB')
+    output = io.BytesIO()
+    Image.blend(noise, gradient, 0.6).save(output, format='JPEG', quality=95)
+    return output.getvalue()
+
+
+def run(model, photos, prepare):
+    sent = 0
+    started = time.perf_counter()
+    for photo in photos:
+        if prepare:
+            data, mime_type, _ = prepare_for_upload(photo)
+        else:
+            data, mime_type = photo, 'image/jpeg'
+        sent += len(data)
+        model.generate_content(['List defects', {'mime_type': mime_type, 'data': data}])
+    return sent, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', type=int, default=4)
+    parser.add_argument('--bandwidth-mbps', type=float, default=20.0)
+    args = parser.parse_args()
+
+    server = make_fake_server(args.bandwidth_mbps)
+    client = GeminiClient(GenaiTransport(
+        api_key_loader=lambda: 'benchmark', endpoint=f"http://127.0.0.1:{server.server_port}"
+    ))
+    model = client.model('gemini-2.0-flash-exp')
+    photos = [make_photo(i) for i in range(args.images)]
+
+    print(f"{args.images} x 12 MP photos, {args.bandwidth_mbps:g} Mbps simulated uplink")
+    baseline = None
+    for label, prepare in (('original', False), ('prepared', True)):
+        sent, seconds = run(model, photos, prepare)
+        note = '' if baseline is None else f"  ({1 - sent / baseline:.0%} fewer bytes)"
+        baseline = baseline or sent
+        print(f"{label:<9} {sent / len(photos) / 1024:>9,.0f} KB/image {seconds / len(photos):>7.2f} s/image{note}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
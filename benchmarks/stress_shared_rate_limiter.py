@@ -0,0 +1,100 @@
+"""
+Multi-process stress test for SharedRateLimiter
+
+Starts N processes that all hammer one SQLite-backed limiter for a while,
+then checks that no sliding window of time_window seconds ever saw more
+than max_requests acquisitions across all processes together
+Exits non-zero if the global rate was exceeded. --unshared runs the same
+load on per-process RateLimiters, which is expected to fail
+
+    python benchmarks/stress_shared_rate_limiter.py --processes 8 --duration 10
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_limiter import RateLimiter, SharedRateLimiter
+
+# Timestamps are taken after acquire() returns, slightly later than the
+# limiter's own record; allow that much jitter when checking windows
+CLOCK_SLACK = 0.05
+
+
+def worker(db_path, max_requests, time_window, stop_at, results):
+    if db_path:
+        limiter = SharedRateLimiter(db_path, max_requests_per_minute=max_requests, time_window=time_window)
+    else:
+        limiter = RateLimiter(max_requests_per_minute=max_requests, time_window=time_window)
+    acquired = []
+    while True:
+        remaining = stop_at - time.time()
+        if remaining <= 0:
+            break
+        if limiter.acquire(timeout=remaining):
+            acquired.append(time.time())
+    results.put(acquired)
+
+
+def max_in_window(timestamps, time_window):
+    """Largest number of timestamps inside any window of time_window seconds"""
+    timestamps = sorted(timestamps)
+    best = 0
+    start = 0
+    for end, t in enumerate(timestamps):
+        while t - timestamps[start] >= time_window - CLOCK_SLACK:
+            start += 1
+        best = max(best, end - start + 1)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--max-requests', type=int, default=10)
+    parser.add_argument('--window', type=float, default=2.0, help='window in seconds')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--unshared', action='store_true', help='use per-process limiters (control run)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = None if args.unshared else os.path.join(tmp, 'rate_limit.db')
+        if db_path:
+            # Create the tables once before the workers race for them
+            SharedRateLimiter(db_path, max_requests_per_minute=args.max_requests, time_window=args.window)
+
+        results = multiprocessing.Queue()
+        stop_at = time.time() + args.duration
+        processes = [
+            multiprocessing.Process(
+                target=worker, args=(db_path, args.max_requests, args.window, stop_at, results)
+            )
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        per_process = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    timestamps = [t for acquired in per_process for t in acquired]
+    peak = max_in_window(timestamps, args.window)
+    ceiling = args.max_requests * (int(args.duration / args.window) + 1)
+
+    print(f"{args.processes} processes, limit {args.max_requests} per {args.window:g}s, {args.duration:g}s run")
+    print(f"acquired per process: {[len(acquired) for acquired in per_process]}")
+    print(f"total acquired: {len(timestamps)} (ceiling {ceiling})")
+    print(f"peak in any {args.window:g}s window: {peak} (limit {args.max_requests})")
+
+    if peak > args.max_requests or len(timestamps) > ceiling:
+        print("FAIL: global rate exceeded")
+        sys.exit(1)
+    print("OK: global rate never exceeded")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,9 @@
 import streamlit as st
 import uuid
-import base64
 from datetime import datetime
-from utils.database import insert_property, execute_query, insert_property_image
+from utils.database import (
+    insert_property, add_property_image, get_seller_portfolio, get_platform_stats
+)
 from utils.theme import init_theme, toggle_theme, apply_theme_styles
 
 st.set_page_config(
@@ -139,22 +140,15 @@ with tab1:
                             with st.spinner(f"Uploading {len(property_images)} images..."):
                                 for idx, img_file in enumerate(property_images):
                                     try:
-                                        # Read and encode image
-                                        img_bytes = img_file.read()
-                                        img_base64 = base64.b64encode(img_bytes).decode()
-                                        
-                                        # Prepare image data
-                                        image_data = {
-                                            'gallery_id': f"IMG_{uuid.uuid4().hex[:8].upper()}",
-                                            'property_id': property_id,
-                                            'image_name': img_file.name,
-                                            'image_data': img_base64,
-                                            'uploaded_by': seller_email,
-                                            'image_order': idx
-                                        }
-                                        
-                                        # Insert image
-                                        insert_property_image(image_data)
+                                        # Original and thumbnail go to the blob store,
+                                        # only their hashes are kept in the table
+                                        add_property_image(
+                                            property_id=property_id,
+                                            image_name=img_file.name,
+                                            image_bytes=img_file.getvalue(),
+                                            uploaded_by=seller_email,
+                                            image_order=idx
+                                        )
                                     except Exception as e:
                                         st.warning(f"Failed to upload {img_file.name}: {str(e)}")
                         
@@ -193,20 +187,14 @@ with tab2:
             st.error("Please enter a valid email address!")
         else:
             with st.spinner("Fetching your properties..."):
-                query = f"""
-                SELECT property_id, property_address, city, property_type, 
-                    price, status, created_at, risk_level
-                FROM PROPERTIES 
-                WHERE seller_email = '{seller_email_lookup}'
-                ORDER BY created_at DESC
-                """
-                result = execute_query(query)
+                # Properties and their photo counts come back in a single query
+                result = get_seller_portfolio(seller_email_lookup)
                 
                 if result and result.get('data'):
                     st.success(f"Found {len(result['data'])} properties")
                     
                     for row in result['data']:
-                        prop_id, address, city, prop_type, price, status, created_at, risk_level = row
+                        prop_id, address, city, prop_type, price, status, created_at, risk_level, inspected_at, img_count = row
                         
                         with st.container():
                             col1, col2, col3 = st.columns([3, 2, 1])
@@ -216,12 +204,8 @@ with tab2:
                                 st.caption(f"📍 {city} | {prop_type} | ₹{price:,}")
                                 
                                 # Show image count
-                                img_query = f"SELECT COUNT(*) FROM PROPERTY_GALLERY WHERE property_id = '{prop_id}'"
-                                img_result = execute_query(img_query)
-                                if img_result and img_result.get('data'):
-                                    img_count = img_result['data'][0][0]
-                                    if img_count > 0:
-                                        st.caption(f"📸 {img_count} photos uploaded")
+                                if img_count > 0:
+                                    st.caption(f"📸 {img_count} photos uploaded")
                             
                             with col2:
                                 if status == 'pending':
@@ -237,6 +221,8 @@ with tab2:
                             with col3:
                                 st.caption(f"ID: {prop_id}")
                                 st.caption(f"Listed: {created_at.strftime('%Y-%m-%d')}")
+                                if inspected_at:
+                                    st.caption(f"Inspected: {inspected_at.strftime('%Y-%m-%d')}")
                             
                             st.markdown("---")
                 else:
@@ -246,19 +232,10 @@ with tab2:
 with st.sidebar:
     st.markdown("### 📊 Quick Stats")
     
-    # Get total properties
-    total_query = "SELECT COUNT(*) as total FROM PROPERTIES"
-    total_result = execute_query(total_query)
-    if total_result and total_result.get('data'):
-        total_properties = total_result['data'][0][0]
-        st.metric("Total Properties Listed", total_properties)
-    
-    # Get pending count
-    pending_query = "SELECT COUNT(*) as pending FROM PROPERTIES WHERE status = 'pending'"
-    pending_result = execute_query(pending_query)
-    if pending_result and pending_result.get('data'):
-        pending_count = pending_result['data'][0][0]
-        st.metric("Pending Inspection", pending_count)
+    platform_stats = get_platform_stats()
+    if platform_stats:
+        st.metric("Total Properties Listed", platform_stats['total'])
+        st.metric("Pending Inspection", platform_stats['by_status'].get('pending', 0))
     
     st.markdown("---")
     
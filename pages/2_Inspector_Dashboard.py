@@ -1,17 +1,21 @@
 import streamlit as st
-import uuid
 from utils.rate_limiter import gemini_rate_limiter
+from utils.retry_policy import gemini_retry_policy
+from utils.response_cache import gemini_response_cache
 from datetime import datetime
 from utils.database import (
-    get_pending_properties, execute_query, get_snowflake_connection
+    iter_pending_properties, submit_inspection_report, get_platform_stats
 )
-from utils.ai_analysis import analyze_property_image, parse_inspector_notes, generate_inspection_summary
+from utils.ai_analysis import (
+    submit_analysis_job, submit_summary_job, fallback_inspection_summary, ALLOW_MOCK_FALLBACK
+)
+from utils.job_queue import get_job_queue, DONE, FAILED, FINISHED_STATES
 from utils.cost_calculator import (
-    calculate_risk_score, assign_risk_level, 
-    calculate_renovation_costs, get_improvement_recommendations, get_statistics
+    calculate_risk_score, assign_risk_level, evaluate_findings, get_statistics
 )
 from PIL import Image
 from utils.theme import init_theme, toggle_theme, apply_theme_styles
+from utils.image_processing import get_upload_stats
 import io
 
 st.set_page_config(
@@ -82,16 +86,17 @@ if st.session_state.inspector_view == 'list':
     st.subheader("🏠 Properties Awaiting Inspection")
     
     with st.spinner("Loading pending properties..."):
-        result = get_pending_properties()
+        # Stream DataFrame batches so only one batch is held in memory
+        status_placeholder = st.empty()
+        pending_count = 0
         
-        if result and result.get('data'):
-            st.success(f"Found {len(result['data'])} properties pending inspection")
-            
-            for row in result['data']:
-                (prop_id, seller_name, seller_email, address, city, state, pincode, 
-                prop_type, bedrooms, bathrooms, sqft, price, description, landmarks, 
-                status, created_at, inspected_at, risk_score, risk_level, 
-                reno_min, reno_max, affected_rooms, total_defects, critical_issues) = row
+        for batch in iter_pending_properties():
+            for prop in batch.itertuples(index=False):
+                pending_count += 1
+                prop_id, seller_name, seller_email = prop.PROPERTY_ID, prop.SELLER_NAME, prop.SELLER_EMAIL
+                address, city, state, pincode = prop.PROPERTY_ADDRESS, prop.CITY, prop.STATE, prop.PINCODE
+                prop_type, bedrooms, sqft, price = prop.PROPERTY_TYPE, prop.BEDROOMS, prop.SQUARE_FEET, prop.PRICE
+                description, landmarks, created_at = prop.DESCRIPTION, prop.NEARBY_LANDMARKS, prop.CREATED_AT
                 
                 with st.container():
                     st.markdown(f"""
@@ -121,8 +126,11 @@ if st.session_state.inspector_view == 'list':
                         st.rerun()
                     
                     st.markdown("---")
+        
+        if pending_count:
+            status_placeholder.success(f"Found {pending_count} properties pending inspection")
         else:
-            st.info("✅ No properties pending inspection at the moment.")
+            status_placeholder.info("✅ No properties pending inspection at the moment.")
 
 # View: Conduct Inspection
 elif st.session_state.inspector_view == 'inspect':
@@ -154,6 +162,24 @@ elif st.session_state.inspector_view == 'inspect':
         
         if 'all_findings' not in st.session_state:
             st.session_state.all_findings = []
+        if 'analysis_jobs' not in st.session_state:
+            # Background analysis jobs whose results are not merged yet
+            st.session_state.analysis_jobs = []
+        if 'analyzed_images' not in st.session_state:
+            # (room, image hash) pairs whose defects are already in the findings
+            st.session_state.analyzed_images = set()
+        
+        def add_findings(room, defects, source):
+            """Append defects of a room to the current findings"""
+            for defect in defects:
+                st.session_state.all_findings.append({
+                    'property_id': property_id,
+                    'room_name': room,
+                    'defect_type': defect['defect_type'],
+                    'severity': defect['severity'],
+                    'description': defect['description'],
+                    'source': source
+                })
         
         for room in rooms:
             with st.expander(f"📍 {room}", expanded=False):
@@ -185,37 +211,87 @@ elif st.session_state.inspector_view == 'inspect':
                             st.image(image, caption=file.name, use_container_width=True)
                     
                     if st.button(f"🤖 Analyze {room} Images", key=f"analyze_{room}"):
-                        with st.spinner(f"AI is analyzing {room} images..."):
-                            for file in uploaded_files:
-                                file.seek(0)
-                                defects = analyze_property_image(file, room)
-                                
-                                for defect in defects:
-                                    finding = {
-                                        'property_id': property_id,
-                                        'room_name': room,
-                                        'defect_type': defect['defect_type'],
-                                        'severity': defect['severity'],
-                                        'description': defect['description'],
-                                        'source': 'image_ai'
-                                    }
-                                    st.session_state.all_findings.append(finding)
-                            
-                            if room_notes:
-                                notes_defects = parse_inspector_notes(room_notes, room)
-                                for defect in notes_defects:
-                                    finding = {
-                                        'property_id': property_id,
-                                        'room_name': room,
-                                        'defect_type': defect['defect_type'],
-                                        'severity': defect['severity'],
-                                        'description': defect['description'],
-                                        'source': 'inspector_notes'
-                                    }
-                                    st.session_state.all_findings.append(finding)
-                            
-                            st.success(f"✅ {room} analyzed successfully!")
+                        # Runs on a background worker; the page stays usable while it waits for quota
+                        job_id = submit_analysis_job(
+                            {room: uploaded_files}, group_id=property_id,
+                            skip_images=st.session_state.analyzed_images
+                        )
+                        if job_id:
+                            st.session_state.analysis_jobs.append(job_id)
                             st.rerun()
+                        st.info(f"✅ All {room} images are already analyzed")
+        
+        # Photos of several rooms share requests and the notes of every room go
+        # out in one request, saving rate-limit permits; the per-room buttons
+        # above only cover photos. Images already analyzed are left out
+        room_uploads = {room: st.session_state.get(f"upload_{room}") or [] for room in rooms}
+        notes_by_room = {room: (st.session_state.get(f"notes_{room}") or '').strip() for room in rooms}
+        active_rooms = [room for room in rooms if room_uploads[room] or notes_by_room[room]]
+        if active_rooms:
+            if st.button(f"🤖 Analyze All {len(active_rooms)} Room(s) Together", use_container_width=True):
+                job_id = submit_analysis_job(
+                    {room: room_uploads[room] for room in active_rooms},
+                    {room: notes_by_room[room] for room in active_rooms},
+                    group_id=property_id,
+                    skip_images=st.session_state.analyzed_images
+                )
+                if job_id:
+                    st.session_state.analysis_jobs.append(job_id)
+                    st.rerun()
+                st.info("✅ All images are already analyzed")
+            if any(notes_by_room.values()):
+                st.caption("📝 Inspector notes are analyzed with this button, in one request for all rooms")
+        
+        # Re-run only this block every 2s while jobs are pending
+        poll_fragment = st.fragment(run_every=2)
+        
+        @poll_fragment
+        def show_analysis_jobs():
+            """Show background job status and merge finished results into the findings"""
+            job_queue = get_job_queue()
+            merged = False
+            for job_id in list(st.session_state.analysis_jobs):
+                job = job_queue.get_job(job_id)
+                if job is None:
+                    st.session_state.analysis_jobs.remove(job_id)
+                    continue
+                job_rooms = ', '.join(job['payload']['rooms'])
+                
+                if job['status'] == DONE:
+                    for room, room_result in job['result']['rooms'].items():
+                        # An image sent by two jobs is only counted once
+                        image_hashes = job['payload']['rooms'][room]['image_hashes']
+                        for image_hash, defects in zip(image_hashes, room_result['image_defects']):
+                            if (room, image_hash) not in st.session_state.analyzed_images:
+                                st.session_state.analyzed_images.add((room, image_hash))
+                                add_findings(room, defects, 'image_ai')
+                        # The latest notes of a room replace its earlier notes findings
+                        if job['payload']['rooms'][room]['notes']:
+                            st.session_state.all_findings = [
+                                f for f in st.session_state.all_findings
+                                if not (f['room_name'] == room and f['source'] == 'inspector_notes')
+                            ]
+                            add_findings(room, room_result['notes_defects'], 'inspector_notes')
+                    st.session_state.analysis_jobs.remove(job_id)
+                    merged = True
+                elif job['status'] == FAILED:
+                    st.error(f"❌ Analysis of {job_rooms} failed: {job['error']}")
+                    if job['error_detail']:
+                        with st.expander("Error details"):
+                            st.code(job['error_detail'])
+                    if st.button("🔁 Retry", key=f"retry_{job_id}"):
+                        job_queue.retry(job_id)
+                        st.rerun()
+                else:
+                    retry_note = f" (retry {job['attempts'] - 1})" if job['attempts'] > 1 else ""
+                    st.info(f"⏳ Analyzing {job_rooms}: {job['status']}{retry_note}")
+            
+            if merged:
+                st.rerun()
+        
+        if st.session_state.analysis_jobs:
+            st.markdown("### 🧵 Analysis Jobs")
+            show_analysis_jobs()
         
         st.markdown("---")
         
@@ -242,109 +318,107 @@ elif st.session_state.inspector_view == 'inspect':
                 if not inspector_email or '@' not in inspector_email:
                     st.error("Please enter a valid inspector email!")
                 else:
-                    with st.spinner("Processing inspection data..."):
-                        risk_score = calculate_risk_score(st.session_state.all_findings)
-                        risk_level = assign_risk_level(risk_score)
-                        min_cost, max_cost = calculate_renovation_costs(st.session_state.all_findings)
-                        stats = get_statistics(st.session_state.all_findings)
-                        recommendations = get_improvement_recommendations(st.session_state.all_findings)
+                    # A background worker writes the summary; the report is saved once it lands
+                    st.session_state.report_job = submit_summary_job(
+                        {
+                            'address': prop_details['address'],
+                            'risk_score': calculate_risk_score(st.session_state.all_findings)
+                        },
+                        st.session_state.all_findings,
+                        group_id=property_id
+                    )
+                    st.rerun()
+            
+            @poll_fragment
+            def wait_for_report_summary(job_id):
+                """Rerun the page once the summary job has finished"""
+                job = get_job_queue().get_job(job_id)
+                if job is None or job['status'] in FINISHED_STATES:
+                    st.rerun()
+                st.info("⏳ AI is writing the inspection summary...")
+            
+            report_job_id = st.session_state.get('report_job')
+            report_job = get_job_queue().get_job(report_job_id) if report_job_id else None
+            if report_job is not None and report_job['status'] not in FINISHED_STATES:
+                wait_for_report_summary(report_job_id)
+            elif report_job is not None and report_job['status'] != DONE and not ALLOW_MOCK_FALLBACK:
+                # Without the opt-in a template summary must never be saved as a real report
+                st.error(f"❌ Could not write the inspection summary: {report_job['error']}")
+                st.caption("The report was not submitted; your findings are kept")
+                if st.button("🔁 Retry Summary", key=f"retry_{report_job_id}"):
+                    get_job_queue().retry(report_job_id)
+                    st.rerun()
+            elif report_job is not None:
+                del st.session_state.report_job
+                with st.spinner("Processing inspection data..."):
+                    risk_score = calculate_risk_score(st.session_state.all_findings)
+                    risk_level = assign_risk_level(risk_score)
+                    (min_cost, max_cost), recommendations = evaluate_findings(st.session_state.all_findings)
+                    stats = get_statistics(st.session_state.all_findings)
+                    
+                    # The summary was written before opening the write transaction
+                    if report_job['status'] == DONE:
+                        summary_text = report_job['result']['summary_text']
+                    else:
+                        st.warning("⚠️ Using fallback summary generation (NIVAASIKA_ALLOW_MOCK_FALLBACK is on)")
+                        summary_text = fallback_inspection_summary(
+                            {'address': prop_details['address'], 'risk_score': risk_score},
+                            st.session_state.all_findings
+                        )
+                    
+                    result = submit_inspection_report(
+                        property_id,
+                        st.session_state.all_findings,
+                        recommendations,
+                        summary={
+                            'summary_text': summary_text,
+                            'total_defects': stats['total_defects'],
+                            'critical_issues': stats['critical_issues'],
+                            'affected_rooms': stats['affected_rooms']
+                        },
+                        property_update={
+                            'risk_score': risk_score,
+                            'risk_level': risk_level,
+                            'min_cost': min_cost,
+                            'max_cost': max_cost,
+                            'affected_rooms': stats['affected_rooms'],
+                            'total_defects': stats['total_defects'],
+                            'critical_issues': stats['critical_issues']
+                        }
+                    )
+                    
+                    if result and result.get('success'):
+                        st.success("✅ Inspection completed successfully!")
+                        st.caption(
+                            f"Saved {result['row_counts']['INSPECTION_FINDINGS']} findings and "
+                            f"{result['row_counts']['PROPERTY_IMPROVEMENTS']} recommendations "
+                            f"in {result['elapsed_seconds']:.2f}s"
+                        )
+                        st.balloons()
                         
-                        conn = get_snowflake_connection()
-                        cursor = conn.cursor()
+                        st.markdown("### 📊 Inspection Summary")
+                        col1, col2, col3, col4 = st.columns(4)
+                        col1.metric("Risk Score", f"{risk_score}")
+                        col2.metric("Risk Level", risk_level)
+                        col3.metric("Total Defects", stats['total_defects'])
+                        col4.metric("Critical Issues", stats['critical_issues'])
                         
-                        try:
-                            for finding in st.session_state.all_findings:
-                                finding_id = f"FIND_{uuid.uuid4().hex[:8].upper()}"
-                                cursor.execute("""
-                                INSERT INTO INSPECTION_FINDINGS 
-                                (finding_id, property_id, room_name, defect_type, severity, description, source)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                                """, (
-                                    finding_id, finding['property_id'], finding['room_name'],
-                                    finding['defect_type'], finding['severity'], 
-                                    finding['description'], finding['source']
-                                ))
-                            
-                            for rec in recommendations:
-                                improvement_id = f"IMP_{uuid.uuid4().hex[:8].upper()}"
-                                cursor.execute("""
-                                INSERT INTO PROPERTY_IMPROVEMENTS
-                                (improvement_id, property_id, defect_type, improvement_action, 
-                                 estimated_cost_range, priority, affected_rooms)
-                                VALUES (%s, %s, %s, %s, %s, %s, %s)
-                                """, (
-                                    improvement_id, property_id, rec['defect_type'],
-                                    rec['action'], rec['cost_range'], rec['priority'], 
-                                    rec['affected_rooms']
-                                ))
-                            
-                            summary_text = generate_inspection_summary(
-                                {'address': prop_details['address'], 'risk_score': risk_score},
-                                st.session_state.all_findings
-                            )
-                            
-                            summary_id = f"SUM_{uuid.uuid4().hex[:8].upper()}"
-                            cursor.execute("""
-                            INSERT INTO INSPECTION_SUMMARY
-                            (summary_id, property_id, summary_text, total_defects, 
-                            critical_issues, affected_rooms)
-                            VALUES (%s, %s, %s, %s, %s, %s)
-                            """, (
-                                summary_id, property_id, summary_text,
-                                stats['total_defects'], stats['critical_issues'], 
-                                stats['affected_rooms']
-                            ))
-                            
-                            cursor.execute("""
-                            UPDATE PROPERTIES SET
-                                status = 'inspected',
-                                inspected_at = CURRENT_TIMESTAMP(),
-                                risk_score = %s,
-                                risk_level = %s,
-                                total_renovation_cost_min = %s,
-                                total_renovation_cost_max = %s,
-                                affected_rooms = %s,
-                                total_defects = %s,
-                                critical_issues = %s
-                            WHERE property_id = %s
-                            """, (
-                                risk_score, risk_level, min_cost, max_cost,
-                                stats['affected_rooms'], stats['total_defects'],
-                                stats['critical_issues'], property_id
-                            ))
-                            
-                            conn.commit()
-                            
-                            st.success("✅ Inspection completed successfully!")
-                            st.balloons()
-                            
-                            st.markdown("### 📊 Inspection Summary")
-                            col1, col2, col3, col4 = st.columns(4)
-                            col1.metric("Risk Score", f"{risk_score}")
-                            col2.metric("Risk Level", risk_level)
-                            col3.metric("Total Defects", stats['total_defects'])
-                            col4.metric("Critical Issues", stats['critical_issues'])
-                            
-                            st.markdown("---")
-                            st.markdown("### 💰 Total Renovation Cost Estimate")
-                            col_min, col_max = st.columns(2)
-                            with col_min:
-                                st.metric("Minimum Cost", f"₹{min_cost:,}")
-                            with col_max:
-                                st.metric("Maximum Cost", f"₹{max_cost:,}")
-                            
-                            st.info(summary_text)
-                            
-                            del st.session_state.selected_property
-                            del st.session_state.all_findings
-                            del st.session_state.property_details
-                            st.session_state.inspector_view = 'list'
-                            
-                        except Exception as e:
-                            conn.rollback()
-                            st.error(f"Error: {str(e)}")
-                        finally:
-                            cursor.close()
+                        st.markdown("---")
+                        st.markdown("### 💰 Total Renovation Cost Estimate")
+                        col_min, col_max = st.columns(2)
+                        with col_min:
+                            st.metric("Minimum Cost", f"₹{min_cost:,}")
+                        with col_max:
+                            st.metric("Maximum Cost", f"₹{max_cost:,}")
+                        
+                        st.info(summary_text)
+                        
+                        del st.session_state.selected_property
+                        del st.session_state.all_findings
+                        del st.session_state.property_details
+                        del st.session_state.analysis_jobs
+                        del st.session_state.analyzed_images
+                        st.session_state.inspector_view = 'list'
         else:
             st.info("Upload and analyze images from at least one room to generate findings.")
 
@@ -352,25 +426,31 @@ elif st.session_state.inspector_view == 'inspect':
 with st.sidebar:
     st.markdown("### 📊 Inspector Stats")
     
-    total_query = "SELECT COUNT(*) FROM PROPERTIES WHERE status = 'inspected'"
-    total_result = execute_query(total_query)
-    if total_result and total_result.get('data'):
-        inspected_count = total_result['data'][0][0]
-        st.metric("Properties Inspected", inspected_count)
-    
-    pending_query = "SELECT COUNT(*) FROM PROPERTIES WHERE status = 'pending'"
-    pending_result = execute_query(pending_query)
-    if pending_result and pending_result.get('data'):
-        pending_count = pending_result['data'][0][0]
-        st.metric("Pending Inspection", pending_count)
+    platform_stats = get_platform_stats()
+    if platform_stats:
+        st.metric("Properties Inspected", platform_stats['by_status'].get('inspected', 0))
+        st.metric("Pending Inspection", platform_stats['by_status'].get('pending', 0))
     
     st.markdown("---")
 
     st.markdown("### 🔒 API Rate Limit")
     remaining = gemini_rate_limiter.get_remaining_requests()
     reset_time = int(gemini_rate_limiter.get_reset_time())
-    st.success(f"✅ {remaining}/10 requests available")
+    st.success(f"✅ {remaining}/{gemini_rate_limiter.max_requests} requests available")
     st.caption(f"Resets in {reset_time}s")
+    retry_stats = gemini_retry_policy.get_stats()
+    if retry_stats['retries'] or retry_stats['gave_up']:
+        st.caption(
+            f"🔁 Gemini retries: {retry_stats['retries']} ({retry_stats['throttled']} rate-limited, "
+            f"{retry_stats['gave_up']} gave up), {retry_stats['wait_seconds']:.0f}s waiting"
+        )
+    cache_stats = gemini_response_cache.get_stats()
+    st.caption(f"⚡ Analysis cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+    upload_stats = get_upload_stats()
+    if upload_stats['images']:
+        st.caption(f"📉 Image uploads: {upload_stats['bytes_saved'] / (1024 * 1024):.1f} MB saved by resizing")
+    job_stats = get_job_queue().get_stats()
+    st.caption(f"🧵 Jobs: {job_stats['queued'] + job_stats['running']} in progress / {job_stats['failed']} failed")
     st.markdown("---")
     
     st.markdown("### 💡 Inspection Tips")
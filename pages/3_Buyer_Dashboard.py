@@ -1,9 +1,7 @@
 import streamlit as st
-import base64
 from utils.database import (
-    get_inspected_properties, get_property_details, 
-    get_property_findings, get_property_improvements, 
-    get_inspection_summary, execute_query, get_property_gallery
+    search_inspected_properties, load_property_bundle, PROPERTY_SECTIONS,
+    get_platform_stats, load_gallery_image, iter_legacy_gallery_data
 )
 from utils.theme import init_theme, toggle_theme, apply_theme_styles, get_theme_colors
 
@@ -37,6 +35,65 @@ st.markdown("---")
 # Initialize session state
 if 'selected_property_id' not in st.session_state:
     st.session_state.selected_property_id = None
+if 'listing_filters' not in st.session_state:
+    st.session_state.listing_filters = {}
+if 'listing_pages' not in st.session_state:
+    # Keyset cursors of the pages visited so far; None is the first page
+    st.session_state.listing_pages = [None]
+
+if 'property_memo' not in st.session_state:
+    # Detail sections and decoded images of the open property
+    st.session_state.property_memo = {'property_id': None, 'sections': {}, 'images': {}}
+
+# Cards per listing page
+PAGE_SIZE = 12
+
+# Detail view sections, rendered only when selected
+DETAIL_SECTIONS = {
+    'summary': "📋 Inspection Summary",
+    'findings': "🔍 Defects Found",
+    'improvements': "🔧 Improvements Needed",
+    'gallery': "📸 House Gallery",
+    'info': "ℹ️ Property Info"
+}
+
+def get_property_memo(property_id):
+    """Get the session memo for a property, dropping the previous property's"""
+    memo = st.session_state.property_memo
+    if memo['property_id'] != property_id:
+        memo.update(property_id=property_id, sections={}, images={})
+    return memo
+
+def load_sections(property_id, names):
+    """
+    Fetch detail sections that are not memoized yet, concurrently
+    Failed reads are not memoized so the next rerun retries them
+    """
+    sections = get_property_memo(property_id)['sections']
+    missing = [name for name in names if name in PROPERTY_SECTIONS and name not in sections]
+    if missing:
+        bundle = load_property_bundle(property_id, sections=missing)
+        for name in missing:
+            value = getattr(bundle, name)
+            if value is not None:
+                sections[name] = value
+    return sections
+
+def get_gallery_image(key, blob_hash, legacy_data=None):
+    """Load and decode a gallery image once per session"""
+    images = st.session_state.property_memo['images']
+    if key not in images:
+        images[key] = load_gallery_image(blob_hash, legacy_data)
+    return images[key]
+
+def load_legacy_gallery_images(property_id, gallery_rows):
+    """Decode legacy base64 gallery rows into the session memo, streaming their payloads"""
+    images = st.session_state.property_memo['images']
+    if all(row[0] in images for row in gallery_rows if row[4]):
+        return
+    for gallery_id, image_data in iter_legacy_gallery_data(property_id):
+        if gallery_id not in images:
+            images[gallery_id] = load_gallery_image(None, image_data)
 
 # Sidebar - Filters
 with st.sidebar:
@@ -49,15 +106,22 @@ with st.sidebar:
     prop_types = st.multiselect("Property Type", ["Apartment", "Independent House", "Villa", "Penthouse", "Studio Apartment"], default=["Apartment", "Independent House", "Villa", "Penthouse", "Studio Apartment"])
     city_filter = st.text_input("City", placeholder="e.g., Mumbai")
     apply_filters = st.button("Apply Filters", type="primary", use_container_width=True)
+    if apply_filters:
+        st.session_state.listing_filters = {
+            'risk_levels': risk_filter,
+            'min_price': min_price,
+            'max_price': max_price,
+            'property_types': prop_types,
+            'city': city_filter
+        }
+        st.session_state.listing_pages = [None]
     
     st.markdown("---")
     st.markdown("### 📊 Market Stats")
-    total_result = execute_query("SELECT COUNT(*) FROM PROPERTIES WHERE status = 'inspected'")
-    if total_result and total_result.get('data'):
-        st.metric("Total Inspected", total_result['data'][0][0])
-    low_risk_result = execute_query("SELECT COUNT(*) FROM PROPERTIES WHERE status = 'inspected' AND risk_level = 'Low'")
-    if low_risk_result and low_risk_result.get('data'):
-        st.metric("Low Risk Properties", low_risk_result['data'][0][0])
+    platform_stats = get_platform_stats()
+    if platform_stats:
+        st.metric("Total Inspected", platform_stats['by_status'].get('inspected', 0))
+        st.metric("Low Risk Properties", platform_stats['by_risk_level'].get('Low', 0))
 
 # Main content
 if st.session_state.selected_property_id:
@@ -65,16 +129,29 @@ if st.session_state.selected_property_id:
     
     if st.button("← Back to All Properties"):
         st.session_state.selected_property_id = None
+        # Reopening a property fetches fresh data
+        st.session_state.property_memo = {'property_id': None, 'sections': {}, 'images': {}}
+        st.session_state.pop('detail_section', None)
         st.rerun()
     
     st.markdown("---")
     
     with st.spinner("Loading property details..."):
-        prop_result = get_property_details(property_id)
+        # Only the header and the selected section are fetched; each is
+        # memoized so switching sections or the theme does not re-query
+        active_section = st.session_state.get('detail_section', 'summary')
+        sections = load_sections(property_id, ('details', active_section))
+        prop_df = sections.get('details')
         
-        if prop_result and prop_result.get('data'):
-            prop_data = prop_result['data'][0]
-            (prop_id, seller_name, seller_email, address, city, state, pincode, prop_type, bedrooms, bathrooms, sqft, price, description, landmarks, status, created_at, inspected_at, risk_score, risk_level, reno_min, reno_max, affected_rooms, total_defects, critical_issues) = prop_data
+        if prop_df is not None and not prop_df.empty:
+            prop = prop_df.iloc[0]
+            prop_id, seller_name, address = prop['PROPERTY_ID'], prop['SELLER_NAME'], prop['PROPERTY_ADDRESS']
+            city, state, pincode = prop['CITY'], prop['STATE'], prop['PINCODE']
+            prop_type, bedrooms, bathrooms, sqft = prop['PROPERTY_TYPE'], prop['BEDROOMS'], prop['BATHROOMS'], prop['SQUARE_FEET']
+            price, description, landmarks = prop['PRICE'], prop['DESCRIPTION'], prop['NEARBY_LANDMARKS']
+            created_at, inspected_at = prop['CREATED_AT'], prop['INSPECTED_AT']
+            risk_score, risk_level = prop['RISK_SCORE'], prop['RISK_LEVEL']
+            reno_min, reno_max = prop['TOTAL_RENOVATION_COST_MIN'], prop['TOTAL_RENOVATION_COST_MAX']
             
             col1, col2 = st.columns([3, 1])
             with col1:
@@ -103,10 +180,13 @@ if st.session_state.selected_property_id:
             
             st.markdown("---")
             
-            tab1, tab2, tab3, tab4, tab5 = st.tabs(["📋 Inspection Summary", "🔍 Defects Found", "🔧 Improvements Needed", "📸 House Gallery", "ℹ️ Property Info"])
+            active_section = st.radio(
+                "Section", list(DETAIL_SECTIONS), format_func=DETAIL_SECTIONS.get,
+                horizontal=True, key="detail_section", label_visibility="collapsed"
+            )
             
-            with tab1:
-                summary_result = get_inspection_summary(property_id)
+            if active_section == 'summary':
+                summary_result = sections.get('summary')
                 if summary_result and summary_result.get('data'):
                     summary_data = summary_result['data'][0]
                     summary_text, tot_defects, crit_issues, aff_rooms = summary_data
@@ -129,34 +209,29 @@ if st.session_state.selected_property_id:
                 else:
                     st.warning("Inspection summary not available.")
             
-            with tab2:
-                findings_result = get_property_findings(property_id)
-                if findings_result and findings_result.get('data'):
+            elif active_section == 'findings':
+                findings_df = sections.get('findings')
+                if findings_df is not None and not findings_df.empty:
                     st.markdown("### 🔍 Detailed Findings")
-                    findings_by_room = {}
-                    for row in findings_result['data']:
-                        room, defect_type, severity, description, source = row
-                        if room not in findings_by_room:
-                            findings_by_room[room] = []
-                        findings_by_room[room].append({'defect': defect_type, 'severity': severity, 'description': description, 'source': source})
-                    for room, findings in findings_by_room.items():
-                        with st.expander(f"📍 {room} ({len(findings)} issues)", expanded=True):
-                            for finding in findings:
-                                severity = finding['severity']
+                    # Rows arrive sorted by severity; group without re-sorting rooms
+                    for room, room_findings in findings_df.groupby('ROOM_NAME', sort=False):
+                        with st.expander(f"📍 {room} ({len(room_findings)} issues)", expanded=True):
+                            for finding in room_findings.itertuples(index=False):
+                                severity = finding.SEVERITY
                                 if severity >= 8:
-                                    st.error(f"**{finding['defect'].title()}** (Severity: {severity}/10)")
+                                    st.error(f"**{finding.DEFECT_TYPE.title()}** (Severity: {severity}/10)")
                                 elif severity >= 5:
-                                    st.warning(f"**{finding['defect'].title()}** (Severity: {severity}/10)")
+                                    st.warning(f"**{finding.DEFECT_TYPE.title()}** (Severity: {severity}/10)")
                                 else:
-                                    st.info(f"**{finding['defect'].title()}** (Severity: {severity}/10)")
-                                st.caption(f"📝 {finding['description']}")
-                                st.caption(f"🔍 Source: {finding['source']}")
+                                    st.info(f"**{finding.DEFECT_TYPE.title()}** (Severity: {severity}/10)")
+                                st.caption(f"📝 {finding.DESCRIPTION}")
+                                st.caption(f"🔍 Source: {finding.SOURCE}")
                                 st.markdown("---")
                 else:
                     st.success("✅ No defects found in this property!")
             
-            with tab3:
-                improvements_result = get_property_improvements(property_id)
+            elif active_section == 'improvements':
+                improvements_result = sections.get('improvements')
                 if improvements_result and improvements_result.get('data'):
                     st.markdown("### 🔧 Recommended Improvements")
                     for row in improvements_result['data']:
@@ -201,30 +276,34 @@ if st.session_state.selected_property_id:
                 else:
                     st.success("✅ No improvements needed!")
             
-            with tab4:
+            elif active_section == 'gallery':
                 st.markdown("### 📸 Property Gallery")
-                gallery_result = get_property_gallery(property_id)
-                if gallery_result and gallery_result.get('data') and len(gallery_result['data']) > 0:
-                    images = gallery_result['data']
-                    st.success(f"📷 {len(images)} photo(s) available")
-                    for i in range(0, len(images), 3):
-                        cols = st.columns(3)
-                        for j, col in enumerate(cols):
-                            if i + j < len(images):
-                                gallery_id, img_name, img_data, uploaded_at, img_order = images[i + j]
-                                with col:
-                                    try:
-                                        img_bytes = base64.b64decode(img_data)
-                                        st.image(img_bytes, caption=img_name, use_container_width=True)
-                                        st.caption(f"📅 {uploaded_at.strftime('%Y-%m-%d')}")
-                                    except Exception as e:
-                                        st.error(f"❌ Failed to load image")
+                gallery_result = sections.get('gallery')
+                gallery_rows = gallery_result['data'] if gallery_result else []
+                if gallery_rows:
+                    st.success(f"📷 {len(gallery_rows)} photo(s) available")
+                    load_legacy_gallery_images(property_id, gallery_rows)
+                    for index, (gallery_id, img_name, img_hash, thumb_hash, has_legacy_data, uploaded_at, img_order) in enumerate(gallery_rows):
+                        if index % 3 == 0:
+                            cols = st.columns(3)
+                        with cols[index % 3]:
+                            try:
+                                # Thumbnails keep the tab light, originals load on demand
+                                if thumb_hash:
+                                    st.image(get_gallery_image(thumb_hash, thumb_hash), caption=img_name, use_container_width=True)
+                                    if st.checkbox("Show full size", key=f"full_{gallery_id}"):
+                                        st.image(get_gallery_image(img_hash, img_hash), use_container_width=True)
+                                else:
+                                    st.image(get_gallery_image(gallery_id, None), caption=img_name, use_container_width=True)
+                                st.caption(f"📅 {uploaded_at.strftime('%Y-%m-%d')}")
+                            except Exception as e:
+                                st.error(f"❌ Failed to load image")
                 else:
                     st.info("📭 No photos available for this property.")
                     st.markdown("**Why?** The seller hasn't uploaded photos yet.")
                     st.markdown('<div style="text-align:center;padding:3rem;background:#f0f2f6;border-radius:10px;margin:2rem 0;"><h1 style="font-size:4rem">🏠</h1><p style="color:#666">No photos uploaded yet</p></div>', unsafe_allow_html=True)
             
-            with tab5:
+            elif active_section == 'info':
                 st.markdown("### 🏠 Property Details")
                 st.markdown("**Description:**")
                 st.write(description)
@@ -247,16 +326,30 @@ if st.session_state.selected_property_id:
 
 else:
     st.subheader("🏘️ Available Properties")
+    sort_labels = {
+        'newest': "Recently inspected",
+        'price_low': "Price: low to high",
+        'price_high': "Price: high to low",
+        'risk_low': "Lowest risk first"
+    }
+    # Cursors are only valid for the sort they were taken from
+    def reset_listing_pages():
+        st.session_state.listing_pages = [None]
+    sort_by = st.selectbox("Sort by", list(sort_labels), format_func=sort_labels.get,
+                           key="listing_sort", on_change=reset_listing_pages)
     with st.spinner("Loading properties..."):
-        result = get_inspected_properties()
+        # Filtering, sorting and paging all happen in SQL; only one page is fetched
+        result = search_inspected_properties(
+            st.session_state.listing_filters, sort=sort_by,
+            page=st.session_state.listing_pages[-1], page_size=PAGE_SIZE
+        )
         if result and result.get('data'):
-            st.success(f"Found {len(result['data'])} inspected properties")
-            filtered_data = result['data']
-            if apply_filters:
-                filtered_data = [row for row in filtered_data if row[8] in risk_filter and row[7] >= min_price and row[7] <= max_price and row[3] in prop_types and (not city_filter or city_filter.lower() in row[2].lower())]
-                st.info(f"Filtered to {len(filtered_data)} properties")
-            for row in filtered_data:
-                (prop_id, address, city, prop_type, bedrooms, bathrooms, sqft, price, risk_score, risk_level, reno_min, reno_max, landmarks) = row
+            page_number = len(st.session_state.listing_pages)
+            first = (page_number - 1) * PAGE_SIZE + 1
+            st.success(f"Found {result['total']} inspected properties")
+            st.caption(f"Showing {first}-{first + len(result['data']) - 1} of {result['total']}")
+            for row in result['data']:
+                (prop_id, address, city, prop_type, bedrooms, bathrooms, sqft, price, risk_score, risk_level, reno_min, reno_max, landmarks, inspected_at) = row
                 with st.container():
                     col1, col2, col3 = st.columns([3, 2, 1])
                     with col1:
@@ -275,6 +368,20 @@ else:
                             st.session_state.selected_property_id = prop_id
                             st.rerun()
                     st.markdown("---")
+            
+            col_prev, col_page, col_next = st.columns([1, 2, 1])
+            with col_prev:
+                if page_number > 1 and st.button("← Previous", use_container_width=True):
+                    st.session_state.listing_pages.pop()
+                    st.rerun()
+            with col_page:
+                st.caption(f"Page {page_number} of {max(1, -(-result['total'] // PAGE_SIZE))}")
+            with col_next:
+                if result['next_page'] is not None and st.button("Next →", use_container_width=True):
+                    st.session_state.listing_pages.append(result['next_page'])
+                    st.rerun()
+        elif st.session_state.listing_filters:
+            st.info("🔍 No properties match these filters.")
         else:
             st.info("📭 No inspected properties available yet. Check back soon!")
 
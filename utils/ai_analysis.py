@@ -1,72 +1,56 @@
-import google.generativeai as genai
 import os
 import json
-from PIL import Image
-import io
-import streamlit as st
-from utils.rate_limiter import gemini_rate_limiter
-import traceback
-
-# Configure Gemini API
-def get_gemini_api_key():
-    """Get Gemini API key from Streamlit secrets"""
-    try:
-        if 'GEMINI_API_KEY' in st.secrets:
-            return st.secrets['GEMINI_API_KEY']
-        else:
-            st.error("❌ GEMINI_API_KEY not found in .streamlit/secrets.toml")
-            return None
-    except Exception as e:
-        st.error(f"❌ Failed to load API key: {str(e)}")
-        return None
-
-# Get API key and configure
-api_key = get_gemini_api_key()
-
-#if api_key:
-    #try:
-        #genai.configure(api_key=api_key)
-        #st.success("✅ Gemini API configured successfully")
-    #except Exception as e:
-        #st.error(f"❌ Failed to configure Gemini: {str(e)}")
+import hashlib
+from utils.retry_policy import gemini_retry_policy
+from utils.response_cache import gemini_response_cache, ResponseCache
+from utils.image_processing import prepare_for_upload
+from utils.blob_store import get_blob_store, content_hash
+from utils.job_queue import get_job_queue, register_job_handler
+from utils.gemini_client import get_gemini_client
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Flag to enable/disable mock mode
 USE_MOCK_MODE = False  # Set to True to use mock data instead of API
 
-def analyze_property_image(image_file, room_name):
-    """
-    Analyze a property image using Gemini Vision API with rate limiting
-    Returns: List of defects found
-    """
-    
-    # Check if mock mode is enabled
-    if USE_MOCK_MODE:
-        st.write("🔍 Debug: Mock mode is ON")
-        return _get_mock_defects(room_name)
-    
-    if not api_key:
-        st.error("❌ Gemini API key not configured!")
-        return _get_mock_defects(room_name)
-    
-    st.write("🔍 Debug: Starting API call...")
-    
-    try:
-        # Check rate limit before making request
-        remaining = gemini_rate_limiter.get_remaining_requests()
-        
-        if remaining <= 0:
-            st.warning("⏳ Rate limit reached. Waiting for reset...")
-            gemini_rate_limiter.wait_if_needed()
-        else:
-            st.info(f"ℹ️ API requests remaining: {remaining}")
-        
-        # Load image
-        st.write("🔍 Debug: Loading image...")
-        image = Image.open(image_file)
-        st.write(f"🔍 Debug: Image loaded: {image.size}")
-        
-        # Create prompt for Gemini
-        prompt = f"""
+# Save a template summary when Gemini could not write one. Off by default,
+# so made-up text never ends up in a real inspection report
+ALLOW_MOCK_FALLBACK = os.getenv('NIVAASIKA_ALLOW_MOCK_FALLBACK', '').lower() in ('1', 'true', 'yes')
+
+# Model used for image analysis
+IMAGE_MODEL_NAME = 'gemini-2.0-flash-exp'
+
+# Model used for inspection summaries
+SUMMARY_MODEL_NAME = 'gemini-1.5-flash'
+
+# Bump whenever the image prompt changes so cached results are not reused
+IMAGE_PROMPT_VERSION = 'v1'
+
+# Same for the multi-image batch prompt; batched results are cached under
+# their own version so either prompt can be changed independently
+BATCH_PROMPT_VERSION = 'batch-v1'
+
+# Bump whenever the notes prompts change so cached results are not reused
+NOTES_PROMPT_VERSION = 'v1'
+
+# Batches of one request analyzed in parallel; the rate limiter still gates each call
+MAX_ANALYSIS_WORKERS = 4
+
+# Images per multimodal request and their total upload size; larger sets are
+# split into several batches (inline request payloads are capped at 20 MB)
+MAX_BATCH_IMAGES = 16
+MAX_BATCH_PAYLOAD_BYTES = 15 * 1024 * 1024
+
+def _image_cache_keys(image_bytes, room_name):
+    """Cache keys for an image under each prompt version, single-image prompt first"""
+    image_hash = hashlib.sha256(image_bytes).hexdigest()
+    return {
+        version: ResponseCache.make_key(image_hash, room_name, version, IMAGE_MODEL_NAME)
+        for version in (IMAGE_PROMPT_VERSION, BATCH_PROMPT_VERSION)
+    }
+
+def _build_image_prompt(room_name):
+    """Prompt asking Gemini for defects in a single room image"""
+    return f"""
 You are an expert property inspector analyzing a {room_name} image.
 
 Identify ALL defects, issues, or concerns visible in this image.
@@ -97,92 +81,204 @@ Be thorough and detailed. Look for:
 - Structural issues
 - Poor finishing or paint issues
 """
-        
-        # Record API request
-        gemini_rate_limiter.record_request()
-        
-        st.info("🤖 Sending image to Gemini AI for analysis...")
-        st.write("🔍 Debug: About to call API...")
-        
-        # Use the gemini-2.0-flash model
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        
-        response = model.generate_content([prompt, image])
-        
-        st.write("🔍 Debug: API call successful!")
-        st.success("✅ AI analysis complete!")
-        
-        # Parse response
-        response_text = response.text.strip()
-        st.write(f"🔍 Debug: Response preview: {response_text[:200]}...")
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith('```json'):
-            response_text = response_text.split('```json')[1]
-        if response_text.startswith('```'):
-            response_text = response_text.split('```')[1]
-        if response_text.endswith('```'):
-            response_text = response_text.rsplit('```', 1)[0]
-        
-        response_text = response_text.strip()
-        
-        # Parse JSON
-        result = json.loads(response_text)
-        
-        defects = result.get('defects', [])
-        
-        if defects:
-            st.info(f"🔍 Found {len(defects)} defect(s) in {room_name}")
+
+def _build_batch_prompt(room_names):
+    """Prompt asking Gemini for defects in several images, tagged by image index"""
+    image_list = "\n".join(f"- Image {idx}: {room}" for idx, room in enumerate(room_names))
+    return f"""
+You are an expert property inspector analyzing {len(room_names)} property images.
+The images follow this text in order; image 0 is the first one.
+
+{image_list}
+
+Analyze EACH image separately and identify ALL defects, issues, or concerns visible in it.
+
+For EACH defect found, provide:
+1. defect_type: One of [crack, damp, wiring, leak, structural, finishing]
+2. severity: Rate from 1-10 (1=minor, 10=critical)
+3. description: Brief description of the issue
+
+Return ONLY valid JSON with one entry per image, in this exact format:
+{{
+    "images": [
+        {{
+            "image_index": 0,
+            "defects": [
+                {{
+                    "defect_type": "crack",
+                    "severity": 7,
+                    "description": "Large vertical crack on wall near ceiling"
+                }}
+            ]
+        }}
+    ]
+}}
+
+Include every image_index from 0 to {len(room_names) - 1}; use "defects": [] for images without defects.
+
+Be thorough and detailed. Look for:
+- Cracks in walls, ceiling, floor
+- Water damage, damp patches, stains
+- Exposed or damaged wiring
+- Leaks or water seepage
+- Structural issues
+- Poor finishing or paint issues
+"""
+
+def _clean_json_response(response_text):
+    """Strip markdown code fences Gemini sometimes wraps around JSON"""
+    response_text = response_text.strip()
+    if response_text.startswith('```json'):
+        response_text = response_text.split('```json')[1]
+    if response_text.startswith('```'):
+        response_text = response_text.split('```')[1]
+    if response_text.endswith('```'):
+        response_text = response_text.rsplit('```', 1)[0]
+    return response_text.strip()
+
+def _gemini_model(name):
+    """
+    Shared model handle for name
+    Raises RuntimeError when no API key is configured, since worker threads
+    cannot show the Streamlit error of the key loader
+    """
+    client = get_gemini_client()
+    if not client.is_available():
+        raise RuntimeError("GEMINI_API_KEY is not configured; add it to .streamlit/secrets.toml")
+    return client.model(name)
+
+def _generate_defects(parts, model=None):
+    """Send one request (rate limited, retrying 429s and 5xx) and parse its JSON"""
+    if model is None:
+        model = _gemini_model(IMAGE_MODEL_NAME)
+    response = gemini_retry_policy.call(model.generate_content, parts)
+    return json.loads(_clean_json_response(response.text))
+
+def _split_batches(prepared, max_images=None, max_bytes=None):
+    """Group prepared images into batches under the image-count and payload limits"""
+    max_images = max_images or MAX_BATCH_IMAGES
+    max_bytes = max_bytes or MAX_BATCH_PAYLOAD_BYTES
+    batches = []
+    current = []
+    current_bytes = 0
+    for item in prepared:
+        size = len(item['upload_bytes'])
+        if current and (len(current) >= max_images or current_bytes + size > max_bytes):
+            batches.append(current)
+            current = []
+            current_bytes = 0
+        current.append(item)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+def _analyze_batch(batch, model=None):
+    """
+    Analyze a batch of prepared images in one multimodal request and
+    demultiplex the defects by image_index. Images the response leaves out
+    are retried one by one. Returns: {position: (defects, prompt version)}
+    """
+    if len(batch) == 1:
+        item = batch[0]
+        defects = _generate_defects([
+            _build_image_prompt(item['room_name']),
+            {'mime_type': item['mime_type'], 'data': item['upload_bytes']}
+        ], model).get('defects', [])
+        return {item['position']: (defects, IMAGE_PROMPT_VERSION)}
+    
+    parts = [_build_batch_prompt([item['room_name'] for item in batch])]
+    parts.extend({'mime_type': item['mime_type'], 'data': item['upload_bytes']} for item in batch)
+    result = _generate_defects(parts, model)
+    
+    by_index = {}
+    for entry in result.get('images', []):
+        try:
+            by_index[int(entry.get('image_index'))] = entry.get('defects', [])
+        except (TypeError, ValueError):
+            continue
+    
+    results = {}
+    for idx, item in enumerate(batch):
+        if idx in by_index:
+            results[item['position']] = (by_index[idx], BATCH_PROMPT_VERSION)
         else:
-            st.success(f"✅ No defects found in {room_name}")
-        
-        return defects
-        
-    except json.JSONDecodeError as e:
-        st.error(f"❌ JSON parsing error: {e}")
-        st.error(f"Response was: {response_text[:200]}...")
-        return []
-    except Exception as e:
-        error_msg = str(e)
-        
-        # ADD DETAILED ERROR INFO
-        st.error(f"❌ API Error: {error_msg}")
-        st.error(f"Error type: {type(e).__name__}")
-        st.write(f"🔍 Debug: Full error: {repr(e)}")
-        
-        # Print the full traceback
-        st.code(traceback.format_exc())
-        
-        # Check for quota errors
-        if '429' in error_msg or 'quota' in error_msg.lower():
-            st.error("🚫 Gemini API quota exceeded!")
-            st.warning("💡 Switching to mock mode for demo...")
-            return _get_mock_defects(room_name)
-        
-        st.warning("⚠️ Falling back to mock data...")
-        return _get_mock_defects(room_name)
+            results.update(_analyze_batch([item], model))
+    return results
 
-def parse_inspector_notes(notes_text, room_name):
+def analyze_images_batched(images, max_workers=MAX_ANALYSIS_WORKERS, model=None):
     """
-    Parse inspector's text notes using Gemini with rate limiting
-    Returns: List of defects mentioned in notes
+    Analyze many images with as few API calls as possible, without touching
+    the Streamlit UI. Raises on API or JSON errors
+    images: list of (image_bytes, room_name), may span several rooms
+    Cached images are skipped, whichever prompt produced the cached result;
+    the rest are sent MAX_BATCH_IMAGES at a time (fewer if the payload limit
+    is hit, down to one image per call)
+    Returns: (list of defect lists in input order, stats dict with
+    api_batches, cached, original_bytes, upload_bytes)
     """
-    if not notes_text or notes_text.strip() == "":
-        return []
+    results = [None] * len(images)
+    stats = {'api_batches': 0, 'cached': 0, 'original_bytes': 0, 'upload_bytes': 0}
     
-    # Check if mock mode
-    if USE_MOCK_MODE:
-        return []
+    prepared = []
+    for position, (image_bytes, room_name) in enumerate(images):
+        cache_keys = _image_cache_keys(image_bytes, room_name)
+        hit, cached_defects = gemini_response_cache.get_first(cache_keys.values())
+        if hit:
+            results[position] = cached_defects
+            stats['cached'] += 1
+            continue
+        
+        upload_bytes, mime_type, upload_stats = prepare_for_upload(image_bytes)
+        stats['original_bytes'] += upload_stats['original_bytes']
+        stats['upload_bytes'] += upload_stats['upload_bytes']
+        prepared.append({
+            'position': position,
+            'room_name': room_name,
+            'cache_keys': cache_keys,
+            'upload_bytes': upload_bytes,
+            'mime_type': mime_type
+        })
     
-    if not api_key:
-        return []
+    batches = _split_batches(prepared)
+    stats['api_batches'] = len(batches)
+    if batches:
+        first_error = None
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+            futures = {executor.submit(_analyze_batch, batch, model): batch for batch in batches}
+            for future in as_completed(futures):
+                try:
+                    batch_results = future.result()
+                except Exception as e:
+                    first_error = first_error or e
+                    continue
+                # Cache per image as each batch lands, so a failed batch
+                # does not throw away the work of the others
+                for item in futures[future]:
+                    defects, prompt_version = batch_results[item['position']]
+                    results[item['position']] = defects
+                    gemini_response_cache.set(item['cache_keys'][prompt_version], defects)
+        if first_error is not None:
+            raise first_error
     
-    try:
-        # Check rate limit
-        if gemini_rate_limiter.get_remaining_requests() <= 0:
-            gemini_rate_limiter.wait_if_needed()
-        
-        prompt = f"""
+    return results, stats
+
+def _read_uploads(image_files):
+    """Read uploaded files on the script thread; workers only see bytes"""
+    images = []
+    for image_file in image_files:
+        image_file.seek(0)
+        images.append(image_file.read())
+    return images
+
+def notes_cache_key(notes_text, room_name):
+    """Cache key for parsed notes: (notes SHA-256, room, prompt version, model)"""
+    notes_hash = hashlib.sha256(notes_text.strip().encode('utf-8')).hexdigest()
+    return ResponseCache.make_key(notes_hash, room_name, NOTES_PROMPT_VERSION, IMAGE_MODEL_NAME)
+
+def _build_notes_prompt(notes_text, room_name):
+    """Prompt asking Gemini to extract defects from inspector notes"""
+    return f"""
 You are analyzing inspector notes for a {room_name}.
 
 Inspector's notes: "{notes_text}"
@@ -207,64 +303,91 @@ Return ONLY valid JSON:
 
 If no defects mentioned, return: {{"defects": []}}
 """
-        
-        # Record request
-        gemini_rate_limiter.record_request()
-        
-        st.info("🤖 Analyzing inspector notes with AI...")
-        
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        response = model.generate_content(prompt)
-        
-        response_text = response.text.strip()
-        
-        # Clean response
-        if response_text.startswith('```json'):
-            response_text = response_text.split('```json')[1]
-        if response_text.startswith('```'):
-            response_text = response_text.split('```')[1]
-        if response_text.endswith('```'):
-            response_text = response_text.rsplit('```', 1)[0]
-        
-        response_text = response_text.strip()
-        
-        result = json.loads(response_text)
-        defects = result.get('defects', [])
-        
-        if defects:
-            st.success(f"✅ Extracted {len(defects)} defect(s) from notes")
-        
-        return defects
-        
-    except Exception as e:
-        st.warning(f"⚠️ Could not parse notes with AI: {str(e)}")
-        st.write(f"🔍 Debug: Full error: {repr(e)}")
-        st.code(traceback.format_exc())
-        return []
 
-def generate_inspection_summary(property_data, findings):
+def _build_bulk_notes_prompt(room_notes):
+    """Prompt asking Gemini to extract defects from the notes of several rooms at once"""
+    notes_list = "\n".join(f'- {room}: "{notes}"' for room, notes in room_notes.items())
+    return f"""
+You are analyzing inspector notes for {len(room_notes)} rooms of a property.
+
+Inspector's notes by room:
+{notes_list}
+
+For EACH room, extract the defects mentioned in its notes and classify them.
+
+For EACH defect, provide:
+1. defect_type: One of [crack, damp, wiring, leak, structural, finishing]
+2. severity: Estimate from 1-10 based on description
+3. description: The defect description from notes
+
+Return ONLY valid JSON with one entry per room, in this exact format:
+{{
+    "rooms": [
+        {{
+            "room_name": "Kitchen",
+            "defects": [
+                {{
+                    "defect_type": "crack",
+                    "severity": 5,
+                    "description": "Minor crack on wall"
+                }}
+            ]
+        }}
+    ]
+}}
+
+Include every room listed above, spelled exactly as given; use "defects": [] for rooms whose notes mention no defects.
+"""
+
+def _parse_notes_defects(notes_text, room_name, model=None):
     """
-    Generate plain-language inspection summary using Gemini with rate limiting
+    Extract defects from one room's notes in a single request, without
+    touching the Streamlit UI. Raises on API or JSON errors
     """
+    return _generate_defects(_build_notes_prompt(notes_text, room_name), model).get('defects', [])
+
+def parse_property_notes(room_notes, model=None):
+    """
+    Extract defects from the notes of every room with one API call, without
+    touching the Streamlit UI. Raises on API or JSON errors
+    room_notes: {room_name: notes text}; rooms with empty notes are skipped
+    Results are cached per (room, notes hash), so editing one room's notes
+    only re-sends that room. Rooms the response leaves out are retried one
+    by one
+    Returns: {room_name: defects} for every room in room_notes
+    """
+    results = {room: [] for room in room_notes}
+    pending = {}
+    for room, notes_text in room_notes.items():
+        if not notes_text or notes_text.strip() == "":
+            continue
+        hit, cached_defects = gemini_response_cache.get(notes_cache_key(notes_text, room))
+        if hit:
+            results[room] = cached_defects
+        else:
+            pending[room] = notes_text.strip()
     
-    # Check if mock mode
-    if USE_MOCK_MODE:
-        return _get_mock_summary(property_data, findings)
+    by_room = {}
+    if len(pending) > 1:
+        for entry in _generate_defects(_build_bulk_notes_prompt(pending), model).get('rooms', []):
+            if isinstance(entry, dict) and entry.get('room_name') in pending:
+                by_room[entry['room_name']] = entry.get('defects', [])
+
+    for room, notes_text in pending.items():
+        defects = by_room[room] if room in by_room else _parse_notes_defects(notes_text, room, model)
+        results[room] = defects
+        gemini_response_cache.set(notes_cache_key(notes_text, room), defects)
     
-    if not api_key:
-        return _get_mock_summary(property_data, findings)
+    return results
+
+def _build_summary_prompt(property_data, findings):
+    """Prompt asking Gemini for a plain-language inspection summary"""
+    findings_text = "\n".join([
+        f"- {f['room_name']}: {f['defect_type']} (severity {f['severity']}) - {f['description']}"
+        for f in findings
+    ])
     
-    try:
-        # Check rate limit
-        if gemini_rate_limiter.get_remaining_requests() <= 0:
-            gemini_rate_limiter.wait_if_needed()
-        
-        findings_text = "\n".join([
-            f"- {f['room_name']}: {f['defect_type']} (severity {f['severity']}) - {f['description']}"
-            for f in findings
-        ])
-        
-        prompt = f"""
+    return f"""
 Generate a concise, plain-language property inspection summary for home buyers.
 
 Property: {property_data['address']}
@@ -282,20 +405,106 @@ Write a 3-4 sentence summary that:
 
 Be professional, clear, and honest. Don't sugarcoat serious issues.
 """
-        
-        # Record request
-        gemini_rate_limiter.record_request()
-        
-        model = genai.GenerativeModel('gemini-1.5-flash')
-        response = model.generate_content(prompt)
-        
-        return response.text.strip()
-        
-    except Exception as e:
-        st.warning("⚠️ Using fallback summary generation")
-        st.write(f"🔍 Debug: Full error: {repr(e)}")
-        st.code(traceback.format_exc())
-        return _get_mock_summary(property_data, findings)
+
+def _summary_text(property_data, findings, model=None):
+    """
+    Generate the summary without touching the Streamlit UI
+    Raises on API errors
+    """
+    if model is None:
+        model = _gemini_model(SUMMARY_MODEL_NAME)
+    response = gemini_retry_policy.call(model.generate_content, _build_summary_prompt(property_data, findings))
+    return response.text.strip()
+
+def fallback_inspection_summary(property_data, findings):
+    """Template summary used when Gemini could not write one"""
+    return _get_mock_summary(property_data, findings)
+
+# Background jobs: pages submit these and poll utils.job_queue for results,
+# so rate-limit waits never block the script thread
+
+def _run_analysis_job(payload):
+    """
+    Job handler: analyze a property's room images and notes
+    payload: {'rooms': {room: {'image_hashes': [...], 'notes': str}}}
+    Returns: {'rooms': {room: {'image_defects', 'notes_defects'}}, 'stats'}
+    """
+    rooms = payload['rooms']
+    
+    if USE_MOCK_MODE:
+        return {
+            'rooms': {
+                room: {
+                    'image_defects': [_get_mock_defects(room) for _ in room_payload['image_hashes']],
+                    'notes_defects': []
+                }
+                for room, room_payload in rooms.items()
+            },
+            'stats': None
+        }
+    
+    blob_store = get_blob_store()
+    images = []
+    for room, room_payload in rooms.items():
+        for blob_hash in room_payload['image_hashes']:
+            image_bytes = blob_store.get(blob_hash)
+            if image_bytes is None:
+                raise FileNotFoundError(f"Image blob {blob_hash} is missing")
+            images.append((image_bytes, room))
+    
+    # Finished images are cached, so a retry only pays for what is left
+    image_results, stats = analyze_images_batched(images)
+    
+    results = {room: {'image_defects': [], 'notes_defects': []} for room in rooms}
+    for (_, room), defects in zip(images, image_results):
+        results[room]['image_defects'].append(defects)
+    
+    # Notes of every room go out in one request
+    notes_defects = parse_property_notes({room: room_payload.get('notes') for room, room_payload in rooms.items()})
+    for room, defects in notes_defects.items():
+        results[room]['notes_defects'] = defects
+    
+    return {'rooms': results, 'stats': stats}
+
+def _run_summary_job(payload):
+    """Job handler: write the inspection summary. Returns: {'summary_text'}"""
+    if USE_MOCK_MODE:
+        return {'summary_text': _get_mock_summary(payload['property_data'], payload['findings'])}
+    return {'summary_text': _summary_text(payload['property_data'], payload['findings'])}
+
+register_job_handler('inspection_analysis', _run_analysis_job)
+register_job_handler('inspection_summary', _run_summary_job)
+
+def submit_analysis_job(room_files, room_notes=None, group_id=None, skip_images=None):
+    """
+    Queue background analysis of uploaded room images and notes
+    Uploads are stored in the blob store; the job only carries their hashes
+    room_files: {room_name: [uploaded files]}
+    room_notes: {room_name: notes text}
+    skip_images: (room_name, image hash) pairs already analyzed, left out
+    Returns: job_id, or None if there is nothing left to analyze
+    """
+    room_notes = room_notes or {}
+    skip_images = skip_images or set()
+    blob_store = get_blob_store()
+    rooms = {}
+    for room, files in room_files.items():
+        image_hashes = []
+        for image_bytes in _read_uploads(files or []):
+            image_hash = content_hash(image_bytes)
+            if (room, image_hash) not in skip_images and image_hash not in image_hashes:
+                image_hashes.append(blob_store.put(image_bytes))
+        if not image_hashes and not room_notes.get(room):
+            continue
+        rooms[room] = {'image_hashes': image_hashes, 'notes': room_notes.get(room) or ''}
+    if not rooms:
+        return None
+    return get_job_queue().submit('inspection_analysis', {'rooms': rooms}, group_id=group_id)
+
+def submit_summary_job(property_data, findings, group_id=None):
+    """Queue background generation of the inspection summary. Returns: job_id"""
+    payload = {'property_data': property_data, 'findings': findings}
+    return get_job_queue().submit('inspection_summary', payload, group_id=group_id)
 
 # Mock data functions for when API is unavailable
 def _get_mock_defects(room_name):
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import tempfile
+
+# Default location for the local filesystem store
+DEFAULT_BLOB_DIR = '.blobstore'
+
+
+def content_hash(data):
+    """SHA-256 hex digest used as the blob key"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    """
+    Interface for content-addressed blob storage
+    Blobs are keyed by the SHA-256 of their bytes, so identical uploads are
+    stored once
+    """
+
+    def put(self, data):
+        """Store bytes and return their content hash"""
+        raise NotImplementedError
+
+    def get(self, blob_hash):
+        """Return the stored bytes, or None if the blob is missing"""
+        raise NotImplementedError
+
+    def exists(self, blob_hash):
+        raise NotImplementedError
+
+    def delete(self, blob_hash):
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    """Blob store backed by a local directory, sharded by hash prefix"""
+
+    def __init__(self, root=DEFAULT_BLOB_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, blob_hash):
+        if len(blob_hash) != 64 or not all(c in '0123456789abcdef' for c in blob_hash):
+            raise ValueError(f"Invalid blob hash: {blob_hash!r}")
+        return os.path.join(self.root, blob_hash[:2], blob_hash[2:4], blob_hash)
+
+    def put(self, data):
+        blob_hash = content_hash(data)
+        path = self._path(blob_hash)
+        if os.path.exists(path):
+            return blob_hash
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return blob_hash
+
+    def get(self, blob_hash):
+        try:
+            with open(self._path(blob_hash), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def exists(self, blob_hash):
+        return os.path.exists(self._path(blob_hash))
+
+    def delete(self, blob_hash):
+        try:
+            os.remove(self._path(blob_hash))
+        except FileNotFoundError:
+            pass
+
+
+_blob_store = None
+
+
+def get_blob_store():
+    """Get the process-wide blob store (local filesystem unless replaced)"""
+    global _blob_store
+    if _blob_store is None:
+        _blob_store = LocalBlobStore(os.getenv('NIVAASIKA_BLOB_DIR', DEFAULT_BLOB_DIR))
+    return _blob_store
+
+
+def set_blob_store(store):
+    """Plug in a different BlobStore implementation"""
+    global _blob_store
+    _blob_store = store
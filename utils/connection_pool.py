@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available before the checkout timeout"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections
+    Works with any driver whose connect function returns a DB-API connection
+    (snowflake.connector, sqlite3, ...)
+    """
+
+    def __init__(self, connect, min_size=1, max_size=5, checkout_timeout=30,
+                 health_check_interval=60, health_check_query="SELECT 1"):
+        """
+        Initialize pool and open min_size connections up front
+        connect: zero-argument callable returning a new connection
+        health_check_interval: seconds a connection may sit idle before it is
+        pinged again on checkout
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_query = health_check_query
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, last_used monotonic time)
+        self._size = 0  # open connections, idle + checked out
+        self._closed = False
+
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'connections_created': 0,
+            'reconnects': 0,
+        }
+
+        for _ in range(min_size):
+            conn = self._open_connection()
+            self._idle.append((conn, time.monotonic()))
+            self._size += 1
+
+    def _open_connection(self):
+        conn = self._connect()
+        with self._lock:
+            self._stats['connections_created'] += 1
+        return conn
+
+    def _is_healthy(self, conn):
+        """Ping a connection, returns False if the session is dead"""
+        is_closed = getattr(conn, 'is_closed', None)
+        if callable(is_closed) and is_closed():
+            return False
+
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _rollback_quietly(conn):
+        """Roll back an open transaction, returns False if the session is dead"""
+        try:
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def checkout(self, timeout=None):
+        """
+        Take a connection from the pool, opening a new one if below max_size
+        Blocks up to timeout seconds when the pool is exhausted
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+        conn = None
+        last_used = None
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"No connection available after {timeout}s (max_size={self.max_size})"
+                    )
+                waited = True
+                self._lock.wait(remaining)
+
+            wait_seconds = time.monotonic() - started
+            self._stats['checkouts'] += 1
+            if waited:
+                self._stats['waits'] += 1
+            self._stats['total_wait_seconds'] += wait_seconds
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], wait_seconds)
+
+        try:
+            if conn is None:
+                return self._open_connection()
+
+            # Only ping connections that have been idle for a while
+            if time.monotonic() - last_used >= self.health_check_interval:
+                if not self._is_healthy(conn):
+                    self._close_quietly(conn)
+                    conn = self._open_connection()
+                    with self._lock:
+                        self._stats['reconnects'] += 1
+            return conn
+        except Exception:
+            # Give the slot back if we could not (re)connect
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+
+    def checkin(self, conn, discard=False):
+        """Return a connection to the pool, or close it if discard is True"""
+        with self._lock:
+            if discard or self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks a connection out and back in"""
+        conn = self.checkout(timeout)
+        healthy = True
+        try:
+            yield conn
+        except Exception:
+            # A failed statement leaves its transaction open and holding locks
+            # (SQLite keeps the database locked), so roll it back and verify
+            # the session is still usable
+            healthy = self._rollback_quietly(conn) and self._is_healthy(conn)
+            raise
+        finally:
+            # Also runs when a streaming caller abandons its generator early;
+            # never hand out a connection that is still inside a transaction
+            if healthy and getattr(conn, 'in_transaction', False):
+                healthy = self._rollback_quietly(conn)
+            self.checkin(conn, discard=not healthy)
+
+    def get_stats(self):
+        """Get pool size and wait-time metrics"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._size - len(self._idle)
+            stats['min_size'] = self.min_size
+            stats['max_size'] = self.max_size
+            checkouts = stats['checkouts']
+            stats['avg_wait_seconds'] = stats['total_wait_seconds'] / checkouts if checkouts else 0.0
+        return stats
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts"""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._lock.notify_all()
@@ -1,4 +1,8 @@
+import time
+import threading
+from bisect import bisect_right
 from utils.database import execute_query
+from utils.queries import get_query
 
 def calculate_risk_score(findings):
     """
@@ -35,53 +39,140 @@ def assign_risk_level(risk_score):
     else:
         return 'High'
 
-def calculate_renovation_costs(findings):
+class ImprovementRulesEngine:
     """
-    Calculate total renovation cost range based on defects
-    Returns: (min_cost, max_cost)
+    In-memory index of IMPROVEMENT_RULES
+    Rules are fetched once, cost ranges are parsed up front, and each defect
+    type keeps its rules sorted by severity_min so a finding is matched with
+    a bisect instead of a scan. Reloaded after ttl seconds or on refresh();
+    after a failed load the previous rules (or none) are kept for
+    retry_after seconds before the next attempt
+    Rules of one defect type are expected to cover disjoint severity ranges
     """
-    # Get improvement rules from database
-    rules_result = execute_query("SELECT * FROM IMPROVEMENT_RULES")
-    
-    if not rules_result or not rules_result.get('data'):
-        return (0, 0)
     
-    # Create rules lookup
-    rules = {}
-    for row in rules_result['data']:
-        rule_id, defect_type, sev_min, sev_max, action, cost_range, priority = row
+    def __init__(self, ttl=600, retry_after=30):
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._index = {}  # defect_type -> (severity_min list, rules)
+        self._loaded_at = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+    
+    def refresh(self):
+        """Reload rules from the database"""
+        rules_result = execute_query(get_query('improvement_rules'))
         
-        if defect_type not in rules:
-            rules[defect_type] = []
+        if not rules_result or not rules_result.get('data'):
+            # Back off instead of re-querying for every finding
+            with self._lock:
+                self._failed_at = time.monotonic()
+            return False
         
-        rules[defect_type].append({
-            'severity_min': sev_min,
-            'severity_max': sev_max,
-            'cost_range': cost_range,
-            'action': action,
-            'priority': priority
-        })
-    
-    # Calculate costs
-    total_min = 0
-    total_max = 0
-    
-    for finding in findings:
-        defect_type = finding.get('defect_type')
-        severity = finding.get('severity', 1)
+        grouped = {}
+        for row in rules_result['data']:
+            rule_id, defect_type, sev_min, sev_max, action, cost_range, priority = row
+            min_cost, max_cost = parse_cost_range(cost_range)
+            
+            grouped.setdefault(defect_type, []).append({
+                'severity_min': sev_min,
+                'severity_max': sev_max,
+                'cost_range': cost_range,
+                'min_cost': min_cost,
+                'max_cost': max_cost,
+                'action': action,
+                'priority': priority
+            })
         
-        if defect_type in rules:
-            # Find matching rule
-            for rule in rules[defect_type]:
-                if rule['severity_min'] <= severity <= rule['severity_max']:
-                    # Parse cost range (e.g., "Rs 5,000 - Rs 20,000")
-                    cost_range = rule['cost_range']
-                    min_cost, max_cost = parse_cost_range(cost_range)
-                    total_min += min_cost
-                    total_max += max_cost
-                    break
-    
-    return (total_min, total_max)
+        index = {}
+        for defect_type, rules in grouped.items():
+            rules.sort(key=lambda r: r['severity_min'])
+            index[defect_type] = ([r['severity_min'] for r in rules], rules)
+        
+        with self._lock:
+            self._index = index
+            self._loaded_at = time.monotonic()
+            self._failed_at = None
+        return True
+    
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        failed_at = self._failed_at
+        if failed_at is not None and now - failed_at < self.retry_after:
+            return
+        loaded_at = self._loaded_at
+        if loaded_at is None or now - loaded_at >= self.ttl:
+            self.refresh()
+    
+    def match(self, defect_type, severity):
+        """Find the rule whose severity range contains severity, or None"""
+        self._ensure_loaded()
+        entry = self._index.get(defect_type)
+        if entry is None:
+            return None
+        
+        starts, rules = entry
+        idx = bisect_right(starts, severity) - 1
+        if idx >= 0 and severity <= rules[idx]['severity_max']:
+            return rules[idx]
+        return None
+    
+    def evaluate(self, findings):
+        """
+        Compute renovation costs and recommendations in one pass over findings
+        Returns: {'cost_range': (min_cost, max_cost), 'recommendations': [...]}
+        """
+        total_min = 0
+        total_max = 0
+        
+        # defect_type -> {'max_severity', 'rooms', 'count'}
+        defect_groups = {}
+        
+        for finding in findings:
+            defect_type = finding.get('defect_type')
+            severity = finding.get('severity', 1)
+            
+            rule = self.match(defect_type, severity)
+            if rule:
+                total_min += rule['min_cost']
+                total_max += rule['max_cost']
+            
+            group = defect_groups.get(defect_type)
+            if group is None:
+                group = defect_groups[defect_type] = {'max_severity': severity, 'rooms': {}, 'count': 0}
+            group['max_severity'] = max(group['max_severity'], severity)
+            group['rooms'][finding.get('room_name')] = True
+            group['count'] += 1
+        
+        recommendations = []
+        for defect_type, group in defect_groups.items():
+            # Recommendation follows the worst finding of each defect type
+            rule = self.match(defect_type, group['max_severity'])
+            if rule:
+                recommendations.append({
+                    'defect_type': defect_type,
+                    'action': rule['action'],
+                    'cost_range': rule['cost_range'],
+                    'priority': rule['priority'],
+                    'affected_rooms': ', '.join(group['rooms']),
+                    'count': group['count']
+                })
+        
+        # Sort by priority
+        priority_order = {'Critical': 1, 'High': 2, 'Medium': 3, 'Low': 4}
+        recommendations.sort(key=lambda x: priority_order.get(x['priority'], 5))
+        
+        return {'cost_range': (total_min, total_max), 'recommendations': recommendations}
+
+# Shared rules engine, loaded on first use
+rules_engine = ImprovementRulesEngine()
+
+def evaluate_findings(findings):
+    """
+    Calculate renovation cost range and improvement recommendations together
+    Returns: ((min_cost, max_cost), recommendations)
+    """
+    result = rules_engine.evaluate(findings)
+    return result['cost_range'], result['recommendations']
 
 def parse_cost_range(cost_str):
     """
@@ -110,71 +201,6 @@ def parse_cost_range(cost_str):
     except:
         return (0, 0)
 
-def get_improvement_recommendations(findings):
-    """
-    Generate improvement recommendations based on findings
-    Returns: List of recommendations with priorities
-    """
-    # Get improvement rules
-    rules_result = execute_query("SELECT * FROM IMPROVEMENT_RULES")
-    
-    if not rules_result or not rules_result.get('data'):
-        return []
-    
-    # Create rules lookup
-    rules = {}
-    for row in rules_result['data']:
-        rule_id, defect_type, sev_min, sev_max, action, cost_range, priority = row
-        
-        if defect_type not in rules:
-            rules[defect_type] = []
-        
-        rules[defect_type].append({
-            'severity_min': sev_min,
-            'severity_max': sev_max,
-            'cost_range': cost_range,
-            'action': action,
-            'priority': priority
-        })
-    
-    recommendations = []
-    
-    # Group findings by defect type
-    defect_groups = {}
-    for finding in findings:
-        defect_type = finding.get('defect_type')
-        if defect_type not in defect_groups:
-            defect_groups[defect_type] = []
-        defect_groups[defect_type].append(finding)
-    
-    # Generate recommendations
-    for defect_type, defect_findings in defect_groups.items():
-        if defect_type in rules:
-            # Get max severity for this defect type
-            max_severity = max([f.get('severity', 1) for f in defect_findings])
-            
-            # Find matching rule
-            for rule in rules[defect_type]:
-                if rule['severity_min'] <= max_severity <= rule['severity_max']:
-                    # Get affected rooms
-                    affected_rooms = list(set([f.get('room_name') for f in defect_findings]))
-                    
-                    recommendations.append({
-                        'defect_type': defect_type,
-                        'action': rule['action'],
-                        'cost_range': rule['cost_range'],
-                        'priority': rule['priority'],
-                        'affected_rooms': ', '.join(affected_rooms),
-                        'count': len(defect_findings)
-                    })
-                    break
-    
-    # Sort by priority
-    priority_order = {'Critical': 1, 'High': 2, 'Medium': 3, 'Low': 4}
-    recommendations.sort(key=lambda x: priority_order.get(x['priority'], 5))
-    
-    return recommendations
-
 def get_statistics(findings):
     """
     Calculate statistics from findings
@@ -1,67 +1,304 @@
 import streamlit as st
-import snowflake.connector
+import pandas as pd
 import os
+import time
+import uuid
+import threading
+import base64
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from utils.connection_pool import ConnectionPool
+from utils.db_backends import SnowflakeBackend, SQLiteBackend, DEFAULT_SQLITE_PATH
+from utils.query_cache import QueryCache
+from utils.queries import get_query, bind_statement, statement_name
+from utils.query_metrics import query_metrics, calling_page, query_page, estimate_bytes
+from utils.blob_store import get_blob_store
+from utils.image_processing import get_image_info, make_thumbnail
+
+try:
+    from snowflake.connector.errors import NotSupportedError
+except ImportError:
+    # Only the embedded backend can be used without the Snowflake driver
+    class NotSupportedError(Exception):
+        pass
+
+# Seconds each read helper's results stay cached
+CACHE_TTLS = {
+    'inspected_properties': 30,
+    'property_details': 300,
+    'property_findings': 300,
+    'property_improvements': 300,
+    'inspection_summary': 300,
+    'property_gallery': 120,
+}
+
+# Process-wide result cache shared by all sessions
+query_cache = QueryCache(max_bytes=int(os.getenv('NIVAASIKA_QUERY_CACHE_MAX_BYTES', 64 * 1024 * 1024)))
+
+# Seconds the shared sidebar stats snapshot is reused before refreshing
+PLATFORM_STATS_TTL = 5
+_platform_stats_lock = threading.Lock()
+
+def _get_snowflake_config():
+    """Read Snowflake settings from Streamlit secrets or environment variables"""
+    # Try to get credentials from Streamlit secrets first (for cloud deployment)
+    if hasattr(st, 'secrets') and 'snowflake' in st.secrets:
+        return dict(st.secrets['snowflake'])
+
+    # Fall back to environment variables (for local development)
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    return {
+        'account': os.getenv('SNOWFLAKE_ACCOUNT'),
+        'user': os.getenv('SNOWFLAKE_USER'),
+        'password': os.getenv('SNOWFLAKE_PASSWORD'),
+        'database': os.getenv('SNOWFLAKE_DATABASE'),
+        'schema': os.getenv('SNOWFLAKE_SCHEMA'),
+        'warehouse': os.getenv('SNOWFLAKE_WAREHOUSE'),
+        'role': os.getenv('SNOWFLAKE_ROLE'),
+        'pool_min_size': os.getenv('SNOWFLAKE_POOL_MIN_SIZE'),
+        'pool_max_size': os.getenv('SNOWFLAKE_POOL_MAX_SIZE'),
+    }
 
 @st.cache_resource
-def get_snowflake_connection():
-    """Create and cache Snowflake connection"""
+def get_database_backend():
+    """
+    Build the configured database backend
+    NIVAASIKA_DB_BACKEND=sqlite runs everything against an embedded, seeded
+    SQLite file (NIVAASIKA_SQLITE_PATH) instead of Snowflake
+    """
+    backend = os.getenv('NIVAASIKA_DB_BACKEND', 'snowflake').lower()
+    if backend == 'sqlite':
+        return SQLiteBackend(
+            path=os.getenv('NIVAASIKA_SQLITE_PATH', DEFAULT_SQLITE_PATH),
+            pool_min_size=int(os.getenv('NIVAASIKA_POOL_MIN_SIZE') or 1),
+            pool_max_size=int(os.getenv('NIVAASIKA_POOL_MAX_SIZE') or 5)
+        )
+    if backend != 'snowflake':
+        raise ValueError(f"Unknown NIVAASIKA_DB_BACKEND: {backend}")
+
+    config = _get_snowflake_config()
+    return SnowflakeBackend(
+        config,
+        pool_min_size=int(config.get('pool_min_size') or 1),
+        pool_max_size=int(config.get('pool_max_size') or 5)
+    )
+
+@st.cache_resource
+def get_connection_pool():
+    """Create and cache the connection pool shared by all sessions"""
+    backend = None
     try:
-        # Try to get credentials from Streamlit secrets first (for cloud deployment)
-        if hasattr(st, 'secrets') and 'snowflake' in st.secrets:
-            conn = snowflake.connector.connect(
-                account=st.secrets['snowflake']['account'],
-                user=st.secrets['snowflake']['user'],
-                password=st.secrets['snowflake']['password'],
-                database=st.secrets['snowflake']['database'],
-                schema=st.secrets['snowflake']['schema'],
-                warehouse=st.secrets['snowflake']['warehouse'],
-                role=st.secrets['snowflake']['role']
-            )
-        # Fall back to environment variables (for local development)
-        else:
-            from dotenv import load_dotenv
-            load_dotenv()
-            
-            conn = snowflake.connector.connect(
-                account=os.getenv('SNOWFLAKE_ACCOUNT'),
-                user=os.getenv('SNOWFLAKE_USER'),
-                password=os.getenv('SNOWFLAKE_PASSWORD'),
-                database=os.getenv('SNOWFLAKE_DATABASE'),
-                schema=os.getenv('SNOWFLAKE_SCHEMA'),
-                warehouse=os.getenv('SNOWFLAKE_WAREHOUSE'),
-                role=os.getenv('SNOWFLAKE_ROLE')
-            )
-        return conn
+        backend = get_database_backend()
+        return ConnectionPool(
+            connect=backend.connect,
+            min_size=backend.pool_min_size,
+            max_size=backend.pool_max_size
+        )
     except Exception as e:
-        st.error(f"Failed to connect to Snowflake: {str(e)}")
+        label = backend.label if backend else 'the database'
+        st.error(f"Failed to connect to {label}: {str(e)}")
         return None
 
-def execute_query(query, params=None):
-    """Execute a SQL query and return results"""
-    conn = get_snowflake_connection()
-    if conn is None:
+@contextmanager
+def pooled_connection():
+    """Check a connection out of the pool for the duration of a with block"""
+    pool = get_connection_pool()
+    if pool is None:
+        raise RuntimeError("Database connection pool is not available")
+    with pool.connection() as conn:
+        yield conn
+
+def get_pool_stats():
+    """Get connection pool metrics (size, checkouts, wait times)"""
+    pool = get_connection_pool()
+    return pool.get_stats() if pool else None
+
+def _fetch_dataframe(cursor):
+    """
+    Fetch a result set as a pandas DataFrame with upper-case column names
+    Snowflake cursors hand over Arrow batches directly; other DB-API
+    drivers fall back to building NumPy-backed columns from the rows
+    """
+    fetch_pandas_all = getattr(cursor, 'fetch_pandas_all', None)
+    if fetch_pandas_all is not None:
+        try:
+            df = fetch_pandas_all()
+            if len(df.columns) == 0:
+                # Empty Arrow results may come back without a schema
+                df = pd.DataFrame(columns=[desc[0] for desc in cursor.description])
+            df.columns = [str(c).upper() for c in df.columns]
+            return df
+        except NotSupportedError:
+            pass
+
+    columns = [desc[0].upper() for desc in cursor.description]
+    return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+def _bind_tagged(page, query, params=None):
+    """bind_statement, with the SQL tagged with the calling page for server-side monitoring"""
+    sql, args = bind_statement(query, params)
+    return get_database_backend().tag_statement(sql, f"nivaasika:{page or 'app'}"), args
+
+def execute_query(query, params=None, as_frame=False):
+    """
+    Execute a SQL query on a pooled connection and return results
+    as_frame: return SELECT results as a pandas DataFrame instead of
+    {'columns', 'data'}
+    Latency, rows and bytes are recorded per statement in query_metrics
+    """
+    pool = get_connection_pool()
+    if pool is None:
         return None
+
+    name = statement_name(query)
+    page = calling_page()
+    started = time.perf_counter()
+    rows = 0
+    bytes_fetched = 0
     
     try:
-        cursor = conn.cursor()
-        if params:
-            cursor.execute(query, params)
-        else:
-            cursor.execute(query)
-        
-        # Check if it's a SELECT query
-        if query.strip().upper().startswith('SELECT'):
-            results = cursor.fetchall()
-            columns = [desc[0] for desc in cursor.description]
-            return {'columns': columns, 'data': results}
-        else:
-            conn.commit()
-            return {'success': True}
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                sql, args = _bind_tagged(page, query, params)
+                if args:
+                    cursor.execute(sql, args)
+                else:
+                    cursor.execute(sql)
+                
+                # Check if it's a SELECT query
+                if query.strip().upper().startswith('SELECT'):
+                    if as_frame:
+                        result = _fetch_dataframe(cursor)
+                        rows = len(result)
+                        bytes_fetched = int(result.memory_usage(deep=True).sum())
+                    else:
+                        data = cursor.fetchall()
+                        columns = [desc[0] for desc in cursor.description]
+                        result = {'columns': columns, 'data': data}
+                        rows = len(data)
+                        bytes_fetched = estimate_bytes(data)
+                else:
+                    conn.commit()
+                    rows = max(cursor.rowcount or 0, 0)
+                    result = {'success': True}
+            finally:
+                cursor.close()
     except Exception as e:
+        query_metrics.record(name, params, time.perf_counter() - started, page=page, error=e)
         st.error(f"Query execution failed: {str(e)}")
         return None
+
+    query_metrics.record(name, params, time.perf_counter() - started, rows, bytes_fetched, page)
+    return result
+
+def iter_query(query, params=None, batch_size=500, as_frame=False):
+    """
+    Stream a SELECT in fetchmany batches instead of materializing it
+    Yields rows, or DataFrame batches when as_frame is True. The cursor is
+    closed and the connection returned to the pool when the generator is
+    exhausted or closed early
+    Recorded latency covers database calls only, not time spent rendering
+    between batches
+    """
+    pool = get_connection_pool()
+    if pool is None:
+        return
+
+    name = statement_name(query)
+    page = calling_page()
+    db_seconds = 0.0
+    rows = 0
+    bytes_fetched = 0
+    error = None
+
+    try:
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                started = time.perf_counter()
+                sql, args = _bind_tagged(page, query, params)
+                if args:
+                    cursor.execute(sql, args)
+                else:
+                    cursor.execute(sql)
+                db_seconds += time.perf_counter() - started
+
+                if as_frame and hasattr(cursor, 'fetch_pandas_batches'):
+                    # Snowflake streams Arrow result chunks one at a time
+                    try:
+                        batches = iter(cursor.fetch_pandas_batches())
+                        while True:
+                            started = time.perf_counter()
+                            df = next(batches, None)
+                            db_seconds += time.perf_counter() - started
+                            if df is None:
+                                break
+                            df.columns = [str(c).upper() for c in df.columns]
+                            rows += len(df)
+                            bytes_fetched += int(df.memory_usage(deep=True).sum())
+                            yield df
+                        return
+                    except NotSupportedError:
+                        pass
+
+                columns = [desc[0].upper() for desc in cursor.description]
+                while True:
+                    started = time.perf_counter()
+                    batch = cursor.fetchmany(batch_size)
+                    db_seconds += time.perf_counter() - started
+                    if not batch:
+                        break
+                    rows += len(batch)
+                    bytes_fetched += estimate_bytes(batch)
+                    if as_frame:
+                        yield pd.DataFrame.from_records(batch, columns=columns)
+                    else:
+                        yield from batch
+            finally:
+                cursor.close()
+    except Exception as e:
+        error = e
+        st.error(f"Query execution failed: {str(e)}")
     finally:
-        cursor.close()
+        query_metrics.record(name, params, db_seconds, rows, bytes_fetched, page, error=error)
+
+def cached_query(query, params=None, ttl=60, tags=(), as_frame=False):
+    """
+    Execute a read query through the shared result cache
+    tags: invalidation tags, e.g. ('property:PROP_1234',)
+    Cached DataFrames are shared between sessions, so treat them as read-only
+    """
+    key = (QueryCache.make_key(query, params), as_frame)
+    hit, result = query_cache.get(key)
+    if hit:
+        return result
+
+    # A write landing while this read runs must not let its result be cached
+    generation = query_cache.generation(tags)
+    result = execute_query(query, params, as_frame=as_frame)
+    # Never cache failures so the next rerun retries
+    if result is not None:
+        query_cache.set(key, result, ttl, tags, generation=generation)
+    return result
+
+def _property_tag(property_id):
+    return f"property:{property_id}"
+
+def invalidate_property_cache(property_id=None):
+    """
+    Drop cached reads affected by a write to a property
+    Also drops the inspected-properties listing; with no property_id
+    every cached result is dropped
+    """
+    if property_id is None:
+        query_cache.clear()
+    else:
+        query_cache.invalidate(_property_tag(property_id), 'listings')
 
 def insert_property(property_data):
     """Insert a new property into the database"""
@@ -77,12 +314,49 @@ def insert_property(property_data):
         %(nearby_landmarks)s, 'pending'
     )
     """
-    return execute_query(query, property_data)
+    result = execute_query(query, property_data)
+    invalidate_property_cache(property_data['property_id'])
+    return result
+
+def iter_pending_properties(batch_size=100):
+    """
+    Yield properties with status='pending' as DataFrame pages, newest first
+    Each page is its own keyset-paginated query, so the pooled connection is
+    back in the pool before the caller renders the page
+    """
+    after = None
+    while True:
+        clauses = ["status = 'pending'"]
+        params = None
+        if after is not None:
+            # Seek past the last row of the previous page; property_id breaks ties
+            clauses.append(
+                "(created_at < %(after_created)s OR "
+                "(created_at = %(after_created)s AND property_id < %(after_id)s))"
+            )
+            params = {'after_created': after[0], 'after_id': after[1]}
+
+        query = f"""
+        SELECT * FROM PROPERTIES
+        WHERE {' AND '.join(clauses)}
+        ORDER BY created_at DESC, property_id DESC
+        LIMIT {int(batch_size)}
+        """
+        df = execute_query(query, params, as_frame=True)
+        if df is None or df.empty:
+            return
+        yield df
+        if len(df) < batch_size:
+            return
+
+        last = df.iloc[-1]
+        created_at = last['CREATED_AT']
+        after = (created_at.to_pydatetime() if hasattr(created_at, 'to_pydatetime') else created_at,
+                 last['PROPERTY_ID'])
 
-def get_pending_properties():
+def get_pending_properties(as_frame=False):
     """Get all properties with status='pending'"""
-    query = "SELECT * FROM PROPERTIES WHERE status = 'pending' ORDER BY created_at DESC"
-    return execute_query(query)
+    return execute_query(get_query('pending_properties'), as_frame=as_frame)
 
 def get_inspected_properties():
     """Get all properties with status='inspected'"""
@@ -94,74 +368,425 @@ def get_inspected_properties():
     WHERE status = 'inspected' 
     ORDER BY inspected_at DESC
     """
-    return execute_query(query)
+    return cached_query(query, ttl=CACHE_TTLS['inspected_properties'], tags=('listings',))
 
-def get_property_details(property_id):
-    """Get detailed information about a specific property"""
-    query = f"SELECT * FROM PROPERTIES WHERE property_id = '{property_id}'"
-    return execute_query(query)
+# Sort options for the buyer listing: (column, direction)
+LISTING_SORTS = {
+    'newest': ('inspected_at', 'DESC'),
+    'price_low': ('price', 'ASC'),
+    'price_high': ('price', 'DESC'),
+    'risk_low': ('risk_score', 'ASC'),
+}
 
-def get_property_findings(property_id):
-    """Get all inspection findings for a property"""
+def _listing_filters(filters):
+    """Build the WHERE clause and bind parameters for the buyer listing"""
+    clauses = ["status = 'inspected'"]
+    params = {}
+
+    risk_levels = filters.get('risk_levels')
+    if risk_levels is not None:
+        names = [f"risk_{i}" for i in range(len(risk_levels))]
+        clauses.append(f"risk_level IN ({', '.join(f'%({n})s' for n in names)})")
+        params.update(zip(names, risk_levels))
+
+    property_types = filters.get('property_types')
+    if property_types is not None:
+        names = [f"type_{i}" for i in range(len(property_types))]
+        clauses.append(f"property_type IN ({', '.join(f'%({n})s' for n in names)})")
+        params.update(zip(names, property_types))
+
+    if filters.get('min_price') is not None:
+        clauses.append("price >= %(min_price)s")
+        params['min_price'] = filters['min_price']
+    if filters.get('max_price') is not None:
+        clauses.append("price <= %(max_price)s")
+        params['max_price'] = filters['max_price']
+
+    if filters.get('city'):
+        clauses.append("LOWER(city) LIKE %(city)s")
+        params['city'] = f"%{filters['city'].strip().lower()}%"
+
+    return clauses, params
+
+def search_inspected_properties(filters=None, sort='newest', page=None, page_size=12):
+    """
+    Search inspected properties with filtering, sorting and keyset pagination in SQL
+    filters: dict with risk_levels, property_types, min_price, max_price, city
+    page: 'next_page' cursor from the previous result (None for the first page)
+    Returns: {'columns', 'data', 'total', 'next_page'} or None on failure
+    Rows have the get_inspected_properties columns plus inspected_at
+    """
+    filters = filters or {}
+    sort_column, direction = LISTING_SORTS[sort]
+
+    # An empty IN () list can never match
+    if filters.get('risk_levels') == [] or filters.get('property_types') == []:
+        return {'columns': [], 'data': [], 'total': 0, 'next_page': None}
+
+    clauses, params = _listing_filters(filters)
+
+    count_query = f"SELECT COUNT(*) FROM PROPERTIES WHERE {' AND '.join(clauses)}"
+    count_result = cached_query(
+        count_query, params, ttl=CACHE_TTLS['inspected_properties'], tags=('listings',)
+    )
+    if count_result is None:
+        return None
+
+    page_clauses = list(clauses)
+    page_params = dict(params)
+    if page is not None:
+        # Seek past the last row of the previous page; property_id breaks ties
+        op = '<' if direction == 'DESC' else '>'
+        page_clauses.append(
+            f"({sort_column} {op} %(after_value)s OR "
+            f"({sort_column} = %(after_value)s AND property_id {op} %(after_id)s))"
+        )
+        page_params['after_value'], page_params['after_id'] = page
+
+    # One extra row tells us whether another page exists. The limit is
+    # inlined because it is constant per page size and keeps one plan per shape
     query = f"""
-    SELECT room_name, defect_type, severity, description, source
-    FROM INSPECTION_FINDINGS 
-    WHERE property_id = '{property_id}'
-    ORDER BY severity DESC
+    SELECT property_id, property_address, city, property_type, bedrooms, 
+           bathrooms, square_feet, price, risk_score, risk_level, 
+           total_renovation_cost_min, total_renovation_cost_max, nearby_landmarks,
+           inspected_at
+    FROM PROPERTIES 
+    WHERE {' AND '.join(page_clauses)}
+    ORDER BY {sort_column} {direction}, property_id {direction}
+    LIMIT {int(page_size) + 1}
     """
-    return execute_query(query)
+    result = cached_query(
+        query, page_params, ttl=CACHE_TTLS['inspected_properties'], tags=('listings',)
+    )
+    if result is None:
+        return None
+
+    rows = result['data'][:page_size]
+    next_page = None
+    if len(result['data']) > page_size:
+        last = rows[-1]
+        sort_index = [c.lower() for c in result['columns']].index(sort_column)
+        next_page = (last[sort_index], last[0])
+
+    return {
+        'columns': result['columns'],
+        'data': rows,
+        'total': count_result['data'][0][0],
+        'next_page': next_page
+    }
+
+def get_seller_portfolio(seller_email):
+    """
+    Get a seller's properties with gallery image counts in one grouped query
+    Returns rows of: property_id, property_address, city, property_type, price,
+    status, created_at, risk_level, inspected_at, image_count
+    """
+    return execute_query(get_query('seller_portfolio'), {'seller_email': seller_email})
+
+def get_platform_stats():
+    """
+    Get property counts by status and by risk level for the sidebars
+    Computed with one GROUP BY and shared by every session as a snapshot
+    that refreshes every PLATFORM_STATS_TTL seconds (or after a write)
+    Returns: {'total', 'by_status', 'by_risk_level'} or None on failure
+    """
+    key = ('platform_stats',)
+    hit, stats = query_cache.get(key)
+    if hit:
+        return stats
+
+    # Only one session refreshes an expired snapshot; the rest reuse its result
+    with _platform_stats_lock:
+        hit, stats = query_cache.get(key)
+        if hit:
+            return stats
+
+        generation = query_cache.generation(('listings',))
+        result = execute_query(get_query('platform_stats'))
+        if result is None:
+            return None
+
+        stats = {'total': 0, 'by_status': {}, 'by_risk_level': {}}
+        for status, risk_level, count in result['data']:
+            stats['total'] += count
+            stats['by_status'][status] = stats['by_status'].get(status, 0) + count
+            # Risk levels only mean something once a property is inspected
+            if status == 'inspected' and risk_level:
+                stats['by_risk_level'][risk_level] = stats['by_risk_level'].get(risk_level, 0) + count
+
+        query_cache.set(key, stats, PLATFORM_STATS_TTL, tags=('listings',), generation=generation)
+        return stats
+
+def get_property_details(property_id, as_frame=False):
+    """Get detailed information about a specific property"""
+    return cached_query(
+        get_query('property_details'), {'property_id': property_id},
+        ttl=CACHE_TTLS['property_details'], tags=(_property_tag(property_id),),
+        as_frame=as_frame
+    )
+
+def get_property_findings(property_id, as_frame=False):
+    """Get all inspection findings for a property"""
+    return cached_query(
+        get_query('property_findings'), {'property_id': property_id},
+        ttl=CACHE_TTLS['property_findings'], tags=(_property_tag(property_id),),
+        as_frame=as_frame
+    )
 
 def get_property_improvements(property_id):
     """Get improvement recommendations for a property"""
-    query = f"""
-    SELECT defect_type, improvement_action, estimated_cost_range, 
-           priority, affected_rooms
-    FROM PROPERTY_IMPROVEMENTS 
-    WHERE property_id = '{property_id}'
-    ORDER BY CASE priority 
-        WHEN 'Critical' THEN 1 
-        WHEN 'High' THEN 2 
-        WHEN 'Medium' THEN 3 
-        ELSE 4 
-    END
-    """
-    return execute_query(query)
+    return cached_query(
+        get_query('property_improvements'), {'property_id': property_id},
+        ttl=CACHE_TTLS['property_improvements'], tags=(_property_tag(property_id),)
+    )
 
 def get_inspection_summary(property_id):
     """Get AI-generated inspection summary"""
-    query = f"""
-    SELECT summary_text, total_defects, critical_issues, affected_rooms
-    FROM INSPECTION_SUMMARY 
-    WHERE property_id = '{property_id}'
+    return cached_query(
+        get_query('inspection_summary'), {'property_id': property_id},
+        ttl=CACHE_TTLS['inspection_summary'], tags=(_property_tag(property_id),)
+    )
+
+@dataclass
+class PropertyBundle:
+    """
+    Everything the buyer detail page shows for one property
+    details and findings are DataFrames, the rest are {'columns', 'data'}
+    results; a section is None if its read failed
+    """
+    property_id: str
+    details: pd.DataFrame = None
+    summary: dict = None
+    findings: pd.DataFrame = None
+    improvements: dict = None
+    gallery: dict = None
+    elapsed_seconds: float = 0.0
+
+# Section names accepted by load_property_bundle
+PROPERTY_SECTIONS = ('details', 'summary', 'findings', 'improvements', 'gallery')
+
+def load_property_bundle(property_id, sections=PROPERTY_SECTIONS):
     """
-    return execute_query(query)
+    Load detail sections of a property concurrently
+    Each read runs on its own pooled connection, so latency is close to the
+    slowest single query rather than the sum of all of them
+    sections: subset of PROPERTY_SECTIONS to fetch; the rest stay None
+    """
+    loaders = {
+        'details': lambda: get_property_details(property_id, as_frame=True),
+        'summary': lambda: get_inspection_summary(property_id),
+        'findings': lambda: get_property_findings(property_id, as_frame=True),
+        'improvements': lambda: get_property_improvements(property_id),
+        'gallery': lambda: get_property_gallery(property_id),
+    }
+    loaders = {name: loader for name, loader in loaders.items() if name in sections}
+
+    started = time.perf_counter()
+    # Worker threads need the script context so st.error still reaches the page
+    ctx = get_script_run_ctx()
+    page = calling_page()
+
+    def run(loader):
+        if ctx is not None:
+            add_script_run_ctx(ctx=ctx)
+        with query_page(page):
+            return loader()
+
+    with ThreadPoolExecutor(max_workers=max(len(loaders), 1)) as executor:
+        futures = {name: executor.submit(run, loader) for name, loader in loaders.items()}
+        sections = {name: future.result() for name, future in futures.items()}
+
+    return PropertyBundle(
+        property_id=property_id,
+        elapsed_seconds=time.perf_counter() - started,
+        **sections
+    )
+
+def submit_inspection_report(property_id, findings, recommendations, summary, property_update):
+    """
+    Write a complete inspection in one transaction with batched inserts
+    findings: finding dicts (room_name, defect_type, severity, description, source)
+    recommendations: recommendation dicts from evaluate_findings
+    summary: dict with summary_text, total_defects, critical_issues, affected_rooms
+    property_update: dict with risk_score, risk_level, min_cost, max_cost,
+    affected_rooms, total_defects, critical_issues
+    Returns: {'success', 'row_counts', 'elapsed_seconds'} or None on failure
+    """
+    finding_rows = [
+        (
+            f"FIND_{uuid.uuid4().hex[:8].upper()}", property_id, f['room_name'],
+            f['defect_type'], f['severity'], f['description'], f['source']
+        )
+        for f in findings
+    ]
+    improvement_rows = [
+        (
+            f"IMP_{uuid.uuid4().hex[:8].upper()}", property_id, rec['defect_type'],
+            rec['action'], rec['cost_range'], rec['priority'], rec['affected_rooms']
+        )
+        for rec in recommendations
+    ]
 
+    started = time.perf_counter()
+    page = calling_page()
+    row_counts = {}
+
+    try:
+        with pooled_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # Snowflake sessions autocommit every statement, so without an
+                # explicit transaction a failure would leave a partial report
+                # behind that rollback() cannot undo
+                cursor.execute("BEGIN")
+                # executemany lets the driver send each table as one multi-row insert
+                if finding_rows:
+                    cursor.executemany(_bind_tagged(page, """
+                    INSERT INTO INSPECTION_FINDINGS
+                    (finding_id, property_id, room_name, defect_type, severity, description, source)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """)[0], finding_rows)
+                row_counts['INSPECTION_FINDINGS'] = len(finding_rows)
+
+                if improvement_rows:
+                    cursor.executemany(_bind_tagged(page, """
+                    INSERT INTO PROPERTY_IMPROVEMENTS
+                    (improvement_id, property_id, defect_type, improvement_action,
+                     estimated_cost_range, priority, affected_rooms)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    """)[0], improvement_rows)
+                row_counts['PROPERTY_IMPROVEMENTS'] = len(improvement_rows)
+
+                cursor.execute(*_bind_tagged(page, """
+                INSERT INTO INSPECTION_SUMMARY
+                (summary_id, property_id, summary_text, total_defects,
+                 critical_issues, affected_rooms)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                """, (
+                    f"SUM_{uuid.uuid4().hex[:8].upper()}", property_id, summary['summary_text'],
+                    summary['total_defects'], summary['critical_issues'], summary['affected_rooms']
+                )))
+                row_counts['INSPECTION_SUMMARY'] = 1
+
+                cursor.execute(*_bind_tagged(page, """
+                UPDATE PROPERTIES SET
+                    status = 'inspected',
+                    inspected_at = CURRENT_TIMESTAMP,
+                    risk_score = %s,
+                    risk_level = %s,
+                    total_renovation_cost_min = %s,
+                    total_renovation_cost_max = %s,
+                    affected_rooms = %s,
+                    total_defects = %s,
+                    critical_issues = %s
+                WHERE property_id = %s
+                """, (
+                    property_update['risk_score'], property_update['risk_level'],
+                    property_update['min_cost'], property_update['max_cost'],
+                    property_update['affected_rooms'], property_update['total_defects'],
+                    property_update['critical_issues'], property_id
+                )))
+                row_counts['PROPERTIES'] = cursor.rowcount
+
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cursor.close()
+    except Exception as e:
+        query_metrics.record('submit_inspection_report', None, time.perf_counter() - started, page=page, error=e)
+        st.error(f"Failed to submit inspection: {str(e)}")
+        return None
 
+    elapsed = time.perf_counter() - started
+    query_metrics.record('submit_inspection_report', None, elapsed, sum(row_counts.values()), page=page)
+    invalidate_property_cache(property_id)
+
+    return {
+        'success': True,
+        'row_counts': row_counts,
+        'elapsed_seconds': elapsed
+    }
 
 def insert_property_image(image_data):
-    """Insert a property gallery image"""
+    """Insert a property gallery image metadata row"""
     query = """
     INSERT INTO PROPERTY_GALLERY (
-        gallery_id, property_id, image_name, image_data, 
-        uploaded_by, image_order
+        gallery_id, property_id, image_name, image_hash, thumbnail_hash,
+        content_type, byte_size, width, height, uploaded_by, image_order
     ) VALUES (
-        %(gallery_id)s, %(property_id)s, %(image_name)s, 
-        %(image_data)s, %(uploaded_by)s, %(image_order)s
+        %(gallery_id)s, %(property_id)s, %(image_name)s, %(image_hash)s,
+        %(thumbnail_hash)s, %(content_type)s, %(byte_size)s, %(width)s,
+        %(height)s, %(uploaded_by)s, %(image_order)s
     )
     """
-    return execute_query(query, image_data)
+    result = execute_query(query, image_data)
+    query_cache.invalidate(_property_tag(image_data['property_id']))
+    return result
+
+def add_property_image(property_id, image_name, image_bytes, uploaded_by, image_order):
+    """
+    Store an uploaded gallery image and its thumbnail in the blob store,
+    then record only their hashes and metadata in PROPERTY_GALLERY
+    """
+    blob_store = get_blob_store()
+    info = get_image_info(image_bytes)
+
+    image_data = {
+        'gallery_id': f"IMG_{uuid.uuid4().hex[:8].upper()}",
+        'property_id': property_id,
+        'image_name': image_name,
+        'image_hash': blob_store.put(image_bytes),
+        'thumbnail_hash': blob_store.put(make_thumbnail(image_bytes)),
+        'content_type': info['content_type'],
+        'byte_size': info['byte_size'],
+        'width': info['width'],
+        'height': info['height'],
+        'uploaded_by': uploaded_by,
+        'image_order': image_order
+    }
+    return insert_property_image(image_data)
 
 def get_property_gallery(property_id):
-    """Get all gallery images for a property"""
-    query = f"""
-    SELECT gallery_id, image_name, image_data, uploaded_at, image_order
-    FROM PROPERTY_GALLERY 
-    WHERE property_id = '{property_id}'
-    ORDER BY image_order ASC, uploaded_at ASC
     """
-    return execute_query(query)
+    Get gallery image metadata for a property
+    Only blob keys are cached; has_legacy_data marks rows whose base64
+    payload must be streamed with iter_legacy_gallery_data
+    """
+    return cached_query(
+        get_query('property_gallery'), {'property_id': property_id},
+        ttl=CACHE_TTLS['property_gallery'],
+        tags=(_property_tag(property_id), 'gallery')
+    )
+
+def iter_legacy_gallery_data(property_id, batch_size=9):
+    """
+    Stream (gallery_id, image_data) of legacy base64 gallery rows
+    Never cached, and fetched batch_size rows at a time instead of all at once
+    """
+    return iter_query(get_query('legacy_gallery_data'), {'property_id': property_id}, batch_size=batch_size)
+
+def load_gallery_image(blob_hash, legacy_data=None):
+    """
+    Get image bytes for a gallery row from the blob store
+    Falls back to decoding legacy base64 image_data
+    """
+    if blob_hash:
+        return get_blob_store().get(blob_hash)
+    if legacy_data:
+        return base64.b64decode(legacy_data)
+    return None
 
-def delete_property_image(gallery_id):
-    """Delete a specific gallery image"""
-    query = f"DELETE FROM PROPERTY_GALLERY WHERE gallery_id = '{gallery_id}'"
-    return execute_query(query)
\ No newline at end of file
+def delete_property_image(gallery_id, property_id=None):
+    """
+    Delete a specific gallery image
+    Pass property_id to invalidate only that property's cached gallery
+    Blobs are left in place since identical uploads share one blob
+    """
+    result = execute_query(get_query('delete_gallery_image'), {'gallery_id': gallery_id})
+    if property_id is None:
+        query_cache.invalidate('gallery')
+    else:
+        query_cache.invalidate(_property_tag(property_id))
+    return result
@@ -0,0 +1,378 @@
+import os
+import random
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# Default database file for the embedded backend
+DEFAULT_SQLITE_PATH = os.path.join('.localdb', 'nivaasika.db')
+
+
+class DatabaseBackend:
+    """
+    Interface for the database behind utils.database
+    Backends hand out DB-API connections that accept qmark (?) parameters,
+    so every helper and page runs unchanged on any of them
+    """
+
+    name = 'base'
+    label = 'database'
+
+    def __init__(self, pool_min_size=1, pool_max_size=5):
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+
+    def connect(self):
+        """Open a new DB-API connection"""
+        raise NotImplementedError
+
+    def tag_statement(self, sql, tag):
+        """Label a statement for server-side monitoring (unchanged by default)"""
+        return sql
+
+
+class SnowflakeBackend(DatabaseBackend):
+    """Snowflake warehouse (production)"""
+
+    name = 'snowflake'
+    label = 'Snowflake'
+
+    def __init__(self, config, pool_min_size=1, pool_max_size=5):
+        super().__init__(pool_min_size, pool_max_size)
+        self.config = config
+
+    def connect(self):
+        """
+        Open a new Snowflake connection
+        qmark binding sends parameters separately from the SQL text, so the
+        server sees one statement per query shape rather than one per value
+        """
+        import snowflake.connector
+
+        return snowflake.connector.connect(
+            account=self.config['account'],
+            user=self.config['user'],
+            password=self.config['password'],
+            database=self.config['database'],
+            schema=self.config['schema'],
+            warehouse=self.config['warehouse'],
+            role=self.config['role'],
+            paramstyle='qmark'
+        )
+
+    def tag_statement(self, sql, tag):
+        """
+        Append the tag as a SQL comment, visible in QUERY_HISTORY.QUERY_TEXT
+        Tagging the statement itself, rather than ALTER SESSION SET QUERY_TAG,
+        costs no extra round trip when a pooled connection moves between pages
+        Snowflake drops leading comments from the recorded text, so the
+        comment goes at the end
+        """
+        return f"{sql}\n/* {tag.replace('*/', '')} */"
+
+
+# Schema of the 7 tables described in the README, in SQLite types
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS PROPERTIES (
+    PROPERTY_ID TEXT PRIMARY KEY,
+    SELLER_NAME TEXT,
+    SELLER_EMAIL TEXT,
+    PROPERTY_ADDRESS TEXT,
+    CITY TEXT,
+    STATE TEXT,
+    PINCODE TEXT,
+    PROPERTY_TYPE TEXT,
+    BEDROOMS INTEGER,
+    BATHROOMS INTEGER,
+    SQUARE_FEET INTEGER,
+    PRICE INTEGER,
+    DESCRIPTION TEXT,
+    NEARBY_LANDMARKS TEXT,
+    STATUS TEXT DEFAULT 'pending',
+    CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INSPECTED_AT TIMESTAMP,
+    RISK_SCORE REAL,
+    RISK_LEVEL TEXT,
+    TOTAL_RENOVATION_COST_MIN INTEGER,
+    TOTAL_RENOVATION_COST_MAX INTEGER,
+    AFFECTED_ROOMS INTEGER,
+    TOTAL_DEFECTS INTEGER,
+    CRITICAL_ISSUES INTEGER
+);
+CREATE INDEX IF NOT EXISTS IDX_PROPERTIES_STATUS ON PROPERTIES (STATUS, INSPECTED_AT);
+CREATE INDEX IF NOT EXISTS IDX_PROPERTIES_SELLER ON PROPERTIES (SELLER_EMAIL);
+
+CREATE TABLE IF NOT EXISTS INSPECTION_IMAGES (
+    IMAGE_ID TEXT PRIMARY KEY,
+    PROPERTY_ID TEXT,
+    ROOM_NAME TEXT,
+    IMAGE_NAME TEXT,
+    IMAGE_HASH TEXT,
+    UPLOADED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS INSPECTION_FINDINGS (
+    FINDING_ID TEXT PRIMARY KEY,
+    PROPERTY_ID TEXT,
+    ROOM_NAME TEXT,
+    DEFECT_TYPE TEXT,
+    SEVERITY INTEGER,
+    DESCRIPTION TEXT,
+    SOURCE TEXT,
+    CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS IDX_FINDINGS_PROPERTY ON INSPECTION_FINDINGS (PROPERTY_ID);
+
+CREATE TABLE IF NOT EXISTS IMPROVEMENT_RULES (
+    RULE_ID TEXT PRIMARY KEY,
+    DEFECT_TYPE TEXT,
+    SEVERITY_MIN INTEGER,
+    SEVERITY_MAX INTEGER,
+    IMPROVEMENT_ACTION TEXT,
+    ESTIMATED_COST_RANGE TEXT,
+    PRIORITY TEXT
+);
+
+CREATE TABLE IF NOT EXISTS PROPERTY_IMPROVEMENTS (
+    IMPROVEMENT_ID TEXT PRIMARY KEY,
+    PROPERTY_ID TEXT,
+    DEFECT_TYPE TEXT,
+    IMPROVEMENT_ACTION TEXT,
+    ESTIMATED_COST_RANGE TEXT,
+    PRIORITY TEXT,
+    AFFECTED_ROOMS TEXT,
+    CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS IDX_IMPROVEMENTS_PROPERTY ON PROPERTY_IMPROVEMENTS (PROPERTY_ID);
+
+CREATE TABLE IF NOT EXISTS INSPECTION_SUMMARY (
+    SUMMARY_ID TEXT PRIMARY KEY,
+    PROPERTY_ID TEXT,
+    SUMMARY_TEXT TEXT,
+    TOTAL_DEFECTS INTEGER,
+    CRITICAL_ISSUES INTEGER,
+    AFFECTED_ROOMS INTEGER,
+    CREATED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS IDX_SUMMARY_PROPERTY ON INSPECTION_SUMMARY (PROPERTY_ID);
+
+CREATE TABLE IF NOT EXISTS PROPERTY_GALLERY (
+    GALLERY_ID TEXT PRIMARY KEY,
+    PROPERTY_ID TEXT,
+    IMAGE_NAME TEXT,
+    IMAGE_DATA TEXT,
+    IMAGE_HASH TEXT,
+    THUMBNAIL_HASH TEXT,
+    CONTENT_TYPE TEXT,
+    BYTE_SIZE INTEGER,
+    WIDTH INTEGER,
+    HEIGHT INTEGER,
+    UPLOADED_BY TEXT,
+    IMAGE_ORDER INTEGER,
+    UPLOADED_AT TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS IDX_GALLERY_PROPERTY ON PROPERTY_GALLERY (PROPERTY_ID);
+"""
+
+# The 13 reference rules; severity ranges of one defect type do not overlap
+IMPROVEMENT_RULES = [
+    ('RULE_001', 'crack', 1, 4, 'Fill hairline cracks with crack filler and repaint', 'Rs 2,000 - Rs 8,000', 'Low'),
+    ('RULE_002', 'crack', 5, 10, 'Get a structural check and repair cracks with epoxy injection', 'Rs 15,000 - Rs 50,000', 'High'),
+    ('RULE_003', 'damp', 1, 5, 'Improve ventilation and apply anti-fungal treatment', 'Rs 5,000 - Rs 15,000', 'Medium'),
+    ('RULE_004', 'damp', 6, 10, 'Waterproof affected walls and replaster', 'Rs 25,000 - Rs 75,000', 'High'),
+    ('RULE_005', 'leak', 1, 5, 'Replace seals and fix plumbing joints', 'Rs 3,000 - Rs 10,000', 'Medium'),
+    ('RULE_006', 'leak', 6, 10, 'Trace the leak source and re-lay damaged pipes or roofing', 'Rs 20,000 - Rs 80,000', 'High'),
+    ('RULE_007', 'wiring', 1, 5, 'Replace exposed wires and faulty switches', 'Rs 5,000 - Rs 20,000', 'High'),
+    ('RULE_008', 'wiring', 6, 10, 'Full electrical audit and rewiring by a licensed electrician', 'Rs 50,000 - Rs 1,50,000', 'Critical'),
+    ('RULE_009', 'structural', 1, 5, 'Structural engineer assessment and localized repair', 'Rs 30,000 - Rs 1,00,000', 'High'),
+    ('RULE_010', 'structural', 6, 10, 'Structural retrofitting of beams, columns or foundation', 'Rs 2,00,000+', 'Critical'),
+    ('RULE_011', 'finishing', 1, 4, 'Touch-up paint and minor surface repairs', 'Rs 1,000 - Rs 5,000', 'Low'),
+    ('RULE_012', 'finishing', 5, 7, 'Repaint rooms and replace damaged tiles', 'Rs 10,000 - Rs 30,000', 'Low'),
+    ('RULE_013', 'finishing', 8, 10, 'Full refinishing of floors, walls and fixtures', 'Rs 40,000 - Rs 1,00,000', 'Medium'),
+]
+
+_SAMPLE_CITIES = [
+    ('Mumbai', 'Maharashtra', '400050'), ('Pune', 'Maharashtra', '411001'),
+    ('Bengaluru', 'Karnataka', '560034'), ('Hyderabad', 'Telangana', '500081'),
+    ('Chennai', 'Tamil Nadu', '600040'), ('Delhi', 'Delhi', '110017'),
+]
+_SAMPLE_TYPES = ['Apartment', 'Independent House', 'Villa', 'Penthouse', 'Studio Apartment']
+_SAMPLE_ROOMS = ['Living Room', 'Kitchen', 'Bedroom 1', 'Bathroom', 'Balcony']
+_SAMPLE_DEFECTS = ['crack', 'damp', 'leak', 'wiring', 'structural', 'finishing']
+
+
+def _adapt_datetime(value):
+    return value.isoformat(' ')
+
+
+def _convert_timestamp(value):
+    return datetime.fromisoformat(value.decode())
+
+
+class SQLiteBackend(DatabaseBackend):
+    """
+    Embedded SQLite database for local development, load tests and CI
+    The schema is created and seeded with IMPROVEMENT_RULES plus a
+    deterministic set of sample properties on first use
+    """
+
+    name = 'sqlite'
+    label = 'local SQLite database'
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, sample_properties=24, seed=42,
+                 pool_min_size=1, pool_max_size=5):
+        super().__init__(pool_min_size, pool_max_size)
+        if path == ':memory:':
+            raise ValueError("Pooled connections need a database file, not :memory:")
+        self.path = path
+        self.sample_properties = sample_properties
+        self.seed = seed
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+        # TIMESTAMP columns round-trip as datetime, like the Snowflake driver
+        sqlite3.register_adapter(datetime, _adapt_datetime)
+        sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+
+    def connect(self):
+        self._ensure_schema()
+        return self._open()
+
+    def _open(self):
+        conn = sqlite3.connect(
+            self.path, timeout=30, check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _ensure_schema(self):
+        if self._initialized:
+            return
+        with self._init_lock:
+            if self._initialized:
+                return
+            db_dir = os.path.dirname(self.path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+
+            conn = self._open()
+            try:
+                conn.executescript(SQLITE_SCHEMA)
+                if conn.execute("SELECT COUNT(*) FROM IMPROVEMENT_RULES").fetchone()[0] == 0:
+                    self._seed(conn)
+                conn.commit()
+            finally:
+                conn.close()
+            self._initialized = True
+
+    def _seed(self, conn):
+        """Insert the rules and sample properties (about two thirds inspected)"""
+        conn.executemany("INSERT INTO IMPROVEMENT_RULES VALUES (?, ?, ?, ?, ?, ?, ?)", IMPROVEMENT_RULES)
+
+        rules = {}
+        for rule in IMPROVEMENT_RULES:
+            rules.setdefault(rule[1], []).append(rule)
+
+        rng = random.Random(self.seed)
+        base_time = datetime(2025, 1, 1, 9, 0, 0)
+
+        for i in range(1, self.sample_properties + 1):
+            property_id = f"PROP_SAMPLE{i:04d}"
+            city, state, pincode = rng.choice(_SAMPLE_CITIES)
+            property_type = rng.choice(_SAMPLE_TYPES)
+            bedrooms = rng.randint(1, 5)
+            created_at = base_time + timedelta(days=i, hours=rng.randint(0, 12))
+            inspected = i % 3 != 0
+
+            conn.execute(
+                """
+                INSERT INTO PROPERTIES (
+                    PROPERTY_ID, SELLER_NAME, SELLER_EMAIL, PROPERTY_ADDRESS, CITY, STATE,
+                    PINCODE, PROPERTY_TYPE, BEDROOMS, BATHROOMS, SQUARE_FEET, PRICE,
+                    DESCRIPTION, NEARBY_LANDMARKS, STATUS, CREATED_AT
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?)
+                """,
+                (
+                    property_id, f"Sample Seller {i % 5 + 1}", f"seller{i % 5 + 1}@example.com",
+                    f"{rng.randint(1, 400)}, Sample Street {i}", city, state, pincode,
+                    property_type, bedrooms, max(1, bedrooms - rng.randint(0, 1)),
+                    bedrooms * rng.randint(350, 600), rng.randint(20, 300) * 100000,
+                    f"Sample {bedrooms}BHK {property_type.lower()} in {city}",
+                    "Metro station, school, hospital", created_at
+                )
+            )
+            if not inspected:
+                continue
+
+            findings = []
+            for n in range(rng.randint(0, 6)):
+                defect_type = rng.choice(_SAMPLE_DEFECTS)
+                severity = rng.randint(1, 10)
+                findings.append((
+                    f"FIND_S{i:04d}{n:02d}", property_id, rng.choice(_SAMPLE_ROOMS), defect_type,
+                    severity, f"Sample {defect_type} defect", rng.choice(['AI Analysis', 'Inspector Notes'])
+                ))
+            conn.executemany(
+                """
+                INSERT INTO INSPECTION_FINDINGS
+                (FINDING_ID, PROPERTY_ID, ROOM_NAME, DEFECT_TYPE, SEVERITY, DESCRIPTION, SOURCE)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                findings
+            )
+
+            # Roll findings up the same way the inspector flow does
+            worst = {}
+            for finding in findings:
+                worst[finding[3]] = max(worst.get(finding[3], 0), finding[4])
+            improvements = []
+            for n, (defect_type, severity) in enumerate(worst.items()):
+                for rule in rules[defect_type]:
+                    if rule[2] <= severity <= rule[3]:
+                        rooms = sorted({f[2] for f in findings if f[3] == defect_type})
+                        improvements.append((
+                            f"IMP_S{i:04d}{n:02d}", property_id, defect_type, rule[4],
+                            rule[5], rule[6], ', '.join(rooms)
+                        ))
+            conn.executemany(
+                """
+                INSERT INTO PROPERTY_IMPROVEMENTS
+                (IMPROVEMENT_ID, PROPERTY_ID, DEFECT_TYPE, IMPROVEMENT_ACTION,
+                 ESTIMATED_COST_RANGE, PRIORITY, AFFECTED_ROOMS)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                improvements
+            )
+
+            risk_score = sum(f[4] for f in findings) * 1.5
+            risk_level = 'Low' if risk_score <= 20 else 'Medium' if risk_score <= 50 else 'High'
+            critical_issues = len([f for f in findings if f[4] >= 8])
+            affected_rooms = len({f[2] for f in findings})
+            cost_min = sum(rng.randint(2, 50) * 1000 for _ in improvements)
+
+            conn.execute(
+                """
+                INSERT INTO INSPECTION_SUMMARY
+                (SUMMARY_ID, PROPERTY_ID, SUMMARY_TEXT, TOTAL_DEFECTS, CRITICAL_ISSUES, AFFECTED_ROOMS)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    f"SUM_S{i:04d}", property_id,
+                    f"Sample inspection found {len(findings)} defect(s) across {affected_rooms} room(s).",
+                    len(findings), critical_issues, affected_rooms
+                )
+            )
+            conn.execute(
+                """
+                UPDATE PROPERTIES SET
+                    STATUS = 'inspected', INSPECTED_AT = ?, RISK_SCORE = ?, RISK_LEVEL = ?,
+                    TOTAL_RENOVATION_COST_MIN = ?, TOTAL_RENOVATION_COST_MAX = ?,
+                    AFFECTED_ROOMS = ?, TOTAL_DEFECTS = ?, CRITICAL_ISSUES = ?
+                WHERE PROPERTY_ID = ?
+                """,
+                (
+                    created_at + timedelta(days=2), risk_score, risk_level, cost_min, cost_min * 2,
+                    affected_rooms, len(findings), critical_issues, property_id
+                )
+            )
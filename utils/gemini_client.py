@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+
+import google.generativeai as genai
+import streamlit as st
+
+# Seconds a single Gemini request may take before it is abandoned
+DEFAULT_TIMEOUT = 60
+
+
+def get_gemini_api_key():
+    """Get Gemini API key from Streamlit secrets"""
+    try:
+        if 'GEMINI_API_KEY' in st.secrets:
+            return st.secrets['GEMINI_API_KEY']
+        else:
+            st.error("❌ GEMINI_API_KEY not found in .streamlit/secrets.toml")
+            return None
+    except Exception as e:
+        st.error(f"❌ Failed to load API key: {str(e)}")
+        return None
+
+
+class GenaiTransport:
+    """
+    Default transport: the google-generativeai SDK
+    endpoint points the SDK at another server over REST (e.g. a local fake
+    Gemini for benchmarks); genai.configure runs once, on the first model
+    A missing key is not remembered, so a key added later is picked up
+    """
+
+    def __init__(self, api_key_loader=get_gemini_api_key, endpoint=None):
+        self.api_key_loader = api_key_loader
+        self.endpoint = endpoint
+        self._configured = False
+        self._api_key = None
+
+    def is_available(self):
+        """True if requests can be sent (an API key, or a custom endpoint that needs none)"""
+        return bool(self.endpoint) or bool(self.api_key())
+
+    def api_key(self):
+        if not self._api_key:
+            self._api_key = self.api_key_loader()
+        return self._api_key
+
+    def configure(self):
+        if self._configured:
+            return
+        api_key = self.api_key()
+        if not api_key and not self.endpoint:
+            raise RuntimeError("GEMINI_API_KEY is not configured; add it to .streamlit/secrets.toml")
+        # A custom endpoint may not check keys, but the SDK insists on one
+        options = {'api_key': api_key or 'local'}
+        if self.endpoint:
+            options['transport'] = 'rest'
+            options['client_options'] = {'api_endpoint': self.endpoint}
+        genai.configure(**options)
+        self._configured = True
+
+    def create_model(self, name, generation_config=None):
+        self.configure()
+        return genai.GenerativeModel(name, generation_config=generation_config)
+
+
+class ModelHandle:
+    """Cached model that applies a timeout to every request"""
+
+    def __init__(self, model, timeout):
+        self.model = model
+        self.timeout = timeout
+
+    def generate_content(self, contents, timeout=None):
+        return self.model.generate_content(
+            contents, request_options={'timeout': timeout or self.timeout}
+        )
+
+
+class GeminiClient:
+    """
+    Process-wide Gemini client
+    Model handles are created once per (model name, generation config) and
+    shared by every session and worker thread. The transport is pluggable:
+    anything with is_available() and create_model(name, generation_config)
+    returning an object with generate_content(contents, request_options)
+    """
+
+    def __init__(self, transport=None, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._models = {}
+        self._transport = transport or GenaiTransport()
+
+    def set_transport(self, transport):
+        """Swap the transport (e.g. for a fake server); drops cached models"""
+        with self._lock:
+            self._transport = transport
+            self._models.clear()
+
+    def is_available(self):
+        return self._transport.is_available()
+
+    def model(self, name, generation_config=None, timeout=None):
+        """Get the shared handle for a model and generation config"""
+        key = (name, json.dumps(generation_config, sort_keys=True), timeout or self.timeout)
+        with self._lock:
+            handle = self._models.get(key)
+            if handle is None:
+                handle = self._models[key] = ModelHandle(
+                    self._transport.create_model(name, generation_config), timeout or self.timeout
+                )
+            return handle
+
+    def get_stats(self):
+        with self._lock:
+            return {'models': len(self._models)}
+
+
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """Get the process-wide Gemini client (GEMINI_API_ENDPOINT overrides the API host)"""
+    global _gemini_client
+    with _gemini_client_lock:
+        if _gemini_client is None:
+            _gemini_client = GeminiClient(
+                transport=GenaiTransport(endpoint=os.getenv('GEMINI_API_ENDPOINT') or None),
+                timeout=float(os.getenv('GEMINI_TIMEOUT_SECONDS', DEFAULT_TIMEOUT))
+            )
+    return _gemini_client
@@ -0,0 +1,100 @@
+import io
+import threading
+from PIL import Image, ImageOps
+
+# Longest edge of gallery thumbnails in pixels
+THUMBNAIL_MAX_EDGE = 480
+THUMBNAIL_QUALITY = 80
+
+
+def get_image_info(image_bytes):
+    """
+    Read basic metadata without decoding the full image
+    Returns: dict with content_type, width, height, byte_size
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        content_type = Image.MIME.get(image.format, 'application/octet-stream')
+        width, height = image.size
+
+    return {
+        'content_type': content_type,
+        'width': width,
+        'height': height,
+        'byte_size': len(image_bytes)
+    }
+
+
+def make_thumbnail(image_bytes, max_edge=THUMBNAIL_MAX_EDGE, quality=THUMBNAIL_QUALITY):
+    """
+    Create a JPEG thumbnail no larger than max_edge on either side
+    Returns: thumbnail bytes
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # Respect camera orientation so thumbnails are not sideways
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_edge, max_edge))
+
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        output = io.BytesIO()
+        image.save(output, format='JPEG', quality=quality, optimize=True)
+        return output.getvalue()
+
+
+# Longest edge of images sent to Gemini; larger photos are downscaled first
+UPLOAD_MAX_EDGE = 1568
+UPLOAD_QUALITY = 85
+UPLOAD_FORMAT = 'JPEG'  # or 'WEBP'
+
+_upload_stats = {'images': 0, 'original_bytes': 0, 'upload_bytes': 0}
+_upload_stats_lock = threading.Lock()
+
+
+def prepare_for_upload(image_bytes, max_edge=UPLOAD_MAX_EDGE, quality=UPLOAD_QUALITY,
+                       image_format=UPLOAD_FORMAT):
+    """
+    Downscale, apply EXIF orientation, strip metadata and re-encode an image
+    before it is sent to Gemini. The re-encoded bytes are always sent, even
+    when they are not smaller, so EXIF (camera, GPS, comments) never leaves
+    the app
+    Returns: (encoded bytes, mime type, stats dict)
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        original_size = image.size
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        # Saving without exif/icc arguments drops the original metadata
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=quality)
+        upload_bytes = output.getvalue()
+        upload_size = image.size
+
+    mime_type = Image.MIME[image_format.upper()]
+
+    stats = {
+        'original_bytes': len(image_bytes),
+        'upload_bytes': len(upload_bytes),
+        'bytes_saved': len(image_bytes) - len(upload_bytes),
+        'original_size': original_size,
+        'upload_size': upload_size
+    }
+
+    with _upload_stats_lock:
+        _upload_stats['images'] += 1
+        _upload_stats['original_bytes'] += stats['original_bytes']
+        _upload_stats['upload_bytes'] += stats['upload_bytes']
+
+    return upload_bytes, mime_type, stats
+
+
+def get_upload_stats():
+    """Get totals of original vs uploaded bytes across all prepared images"""
+    with _upload_stats_lock:
+        stats = dict(_upload_stats)
+    stats['bytes_saved'] = stats['original_bytes'] - stats['upload_bytes']
+    return stats
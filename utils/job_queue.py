@@ -0,0 +1,288 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+# Default location of the job database
+DEFAULT_JOB_DB = os.path.join('.localdb', 'jobs.db')
+
+# Job states; queued jobs (including retries) wait for a worker
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+FINISHED_STATES = (DONE, FAILED)
+
+# kind -> handler(payload) returning a JSON-serializable result
+JOB_HANDLERS = {}
+
+
+def register_job_handler(kind, handler):
+    """
+    Register the function that runs jobs of a kind
+    Handlers run on worker threads, so they must not call Streamlit; they
+    raise to fail the job, and the traceback is stored on it
+    """
+    JOB_HANDLERS[kind] = handler
+
+
+class JobQueue:
+    """
+    Background job queue persisted in SQLite
+    Worker threads claim queued jobs, run the registered handler and store
+    the result, so pages only submit and poll. A claimed job is leased to
+    this queue for LEASE_SECONDS and the lease is renewed while it runs;
+    jobs whose lease lapsed (their process crashed) are claimed again by any
+    worker. Failed jobs are retried with exponential backoff up to
+    max_attempts. The default is one attempt, since handlers calling Gemini
+    already retry transient errors through RetryPolicy; failed jobs wait for
+    retry()
+    """
+
+    POLL_INTERVAL = 0.5
+    LEASE_SECONDS = 60
+
+    def __init__(self, db_path=DEFAULT_JOB_DB, workers=2, max_attempts=1, retry_delay=5):
+        self.db_path = db_path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._wakeup = threading.Condition()
+        self._threads = []
+        self._stopping = False
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_jobs (
+            job_id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            group_id TEXT,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            run_after REAL NOT NULL,
+            error_detail TEXT,
+            worker_id TEXT,
+            lease_until REAL
+        )
+        """)
+        # Job databases created before leases and error details were added
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(analysis_jobs)")}
+        for column, column_type in (('error_detail', 'TEXT'), ('worker_id', 'TEXT'), ('lease_until', 'REAL')):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE analysis_jobs ADD COLUMN {column} {column_type}")
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_analysis_jobs_status ON analysis_jobs (status, run_after)"
+        )
+
+    def _connection(self):
+        """One autocommit connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def start(self):
+        """Start the worker threads and the lease heartbeat (no-op if already running)"""
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._renew_leases, name="job-lease-heartbeat", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Ask workers to exit after their current job"""
+        self._stopping = True
+        with self._wakeup:
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopping = False
+
+    def submit(self, kind, payload, group_id=None):
+        """Queue a job and return its job_id"""
+        job_id = f"JOB_{uuid.uuid4().hex[:12].upper()}"
+        now = time.time()
+        self._connection().execute(
+            """
+            INSERT INTO analysis_jobs
+            (job_id, kind, group_id, payload, status, attempts, created_at, updated_at, run_after)
+            VALUES (?, ?, ?, ?, ?, 0, ?, ?, ?)
+            """,
+            (job_id, kind, group_id, json.dumps(payload), QUEUED, now, now, now)
+        )
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def retry(self, job_id):
+        """Requeue a failed job with a fresh attempt budget"""
+        self._connection().execute(
+            "UPDATE analysis_jobs SET status = ?, attempts = 0, error = NULL, error_detail = NULL, "
+            "updated_at = ?, run_after = ? WHERE job_id = ? AND status = ?",
+            (QUEUED, time.time(), time.time(), job_id, FAILED)
+        )
+        with self._wakeup:
+            self._wakeup.notify()
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] is not None else None
+        return job
+
+    def get_job(self, job_id):
+        """Get a job as a dict, or None if it does not exist"""
+        row = self._connection().execute(
+            "SELECT * FROM analysis_jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def get_jobs(self, group_id):
+        """Get all jobs of a group, oldest first"""
+        rows = self._connection().execute(
+            "SELECT * FROM analysis_jobs WHERE group_id = ? ORDER BY created_at", (group_id,)
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def get_stats(self):
+        """Get job counts by status"""
+        rows = self._connection().execute(
+            "SELECT status, COUNT(*) FROM analysis_jobs GROUP BY status"
+        ).fetchall()
+        stats = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        stats.update({status: count for status, count in rows})
+        return stats
+
+    def _claim(self):
+        """
+        Atomically lease the oldest runnable job to this queue and return it
+        Runnable: queued and due, or running under a lease that has lapsed
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                """
+                SELECT * FROM analysis_jobs
+                WHERE (status = ? AND run_after <= ?)
+                   OR (status = ? AND COALESCE(lease_until, 0) < ?)
+                ORDER BY created_at LIMIT 1
+                """,
+                (QUEUED, now, RUNNING, now)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE analysis_jobs SET status = ?, attempts = attempts + 1, updated_at = ?, "
+                    "worker_id = ?, lease_until = ? WHERE job_id = ?",
+                    (RUNNING, now, self.worker_id, now + self.LEASE_SECONDS, row['job_id'])
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = self._to_dict(row)
+        job['attempts'] += 1
+        return job
+
+    def _finish(self, job, result=None, error=None, error_detail=None):
+        """
+        Store the outcome of a job this queue still holds the lease on
+        error: one-line message shown on the page; error_detail: traceback
+        """
+        conn = self._connection()
+        now = time.time()
+        if error is None:
+            status, run_after = DONE, None
+        elif job['attempts'] < self.max_attempts:
+            # Back off 1x, 2x, 4x ... retry_delay before the next attempt
+            status, run_after = QUEUED, now + self.retry_delay * (2 ** (job['attempts'] - 1))
+        else:
+            status, run_after = FAILED, None
+        conn.execute(
+            """
+            UPDATE analysis_jobs SET status = ?, result = ?, error = ?, error_detail = ?, updated_at = ?,
+                run_after = COALESCE(?, run_after), worker_id = NULL, lease_until = NULL
+            WHERE job_id = ? AND worker_id = ?
+            """,
+            (status, json.dumps(result) if error is None else None, error, error_detail, now,
+             run_after, job['job_id'], self.worker_id)
+        )
+
+    def _renew_leases(self):
+        """Keep extending the leases of jobs this queue is running"""
+        while not self._stopping:
+            try:
+                now = time.time()
+                self._connection().execute(
+                    "UPDATE analysis_jobs SET lease_until = ? WHERE worker_id = ? AND status = ?",
+                    (now + self.LEASE_SECONDS, self.worker_id, RUNNING)
+                )
+            except sqlite3.OperationalError:
+                pass
+            with self._wakeup:
+                self._wakeup.wait(self.LEASE_SECONDS / 3)
+
+    def _work(self):
+        while not self._stopping:
+            try:
+                job = self._claim()
+            except sqlite3.OperationalError:
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(self.POLL_INTERVAL)
+                continue
+
+            handler = JOB_HANDLERS.get(job['kind'])
+            try:
+                if handler is None:
+                    raise RuntimeError(f"No handler registered for job kind {job['kind']!r}")
+                result = handler(job['payload'])
+            except Exception as e:
+                self._finish(job, error=f"{type(e).__name__}: {e}", error_detail=traceback.format_exc())
+            else:
+                self._finish(job, result=result)
+
+
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Get the process-wide job queue, starting its workers on first use"""
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                db_path=os.getenv('NIVAASIKA_JOB_DB', DEFAULT_JOB_DB),
+                workers=int(os.getenv('NIVAASIKA_JOB_WORKERS', 2))
+            )
+            _job_queue.start()
+    return _job_queue
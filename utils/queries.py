@@ -0,0 +1,145 @@
+import hashlib
+import re
+from functools import lru_cache
+
+# Named, fully parameterized statements for the hot read/write paths
+# Placeholders use %(name)s; execute_query compiles them to ? bind markers
+# so the SQL text is identical for every ID and server-side plan and
+# result caches can be reused
+QUERIES = {
+    'property_details': """
+    SELECT * FROM PROPERTIES WHERE property_id = %(property_id)s
+    """,
+    'property_findings': """
+    SELECT room_name, defect_type, severity, description, source
+    FROM INSPECTION_FINDINGS
+    WHERE property_id = %(property_id)s
+    ORDER BY severity DESC
+    """,
+    'property_improvements': """
+    SELECT defect_type, improvement_action, estimated_cost_range,
+           priority, affected_rooms
+    FROM PROPERTY_IMPROVEMENTS
+    WHERE property_id = %(property_id)s
+    ORDER BY CASE priority
+        WHEN 'Critical' THEN 1
+        WHEN 'High' THEN 2
+        WHEN 'Medium' THEN 3
+        ELSE 4
+    END
+    """,
+    'inspection_summary': """
+    SELECT summary_text, total_defects, critical_issues, affected_rooms
+    FROM INSPECTION_SUMMARY
+    WHERE property_id = %(property_id)s
+    """,
+    'property_gallery': """
+    SELECT gallery_id, image_name, image_hash, thumbnail_hash,
+           CASE WHEN image_hash IS NULL AND image_data IS NOT NULL THEN 1 ELSE 0 END AS has_legacy_data,
+           uploaded_at, image_order
+    FROM PROPERTY_GALLERY
+    WHERE property_id = %(property_id)s
+    ORDER BY image_order ASC, uploaded_at ASC
+    """,
+    'legacy_gallery_data': """
+    SELECT gallery_id, image_data
+    FROM PROPERTY_GALLERY
+    WHERE property_id = %(property_id)s AND image_hash IS NULL AND image_data IS NOT NULL
+    ORDER BY image_order ASC, uploaded_at ASC
+    """,
+    'pending_properties': """
+    SELECT * FROM PROPERTIES WHERE status = 'pending' ORDER BY created_at DESC
+    """,
+    'platform_stats': """
+    SELECT status, risk_level, COUNT(*)
+    FROM PROPERTIES
+    GROUP BY status, risk_level
+    """,
+    'improvement_rules': """
+    SELECT * FROM IMPROVEMENT_RULES
+    """,
+    'delete_gallery_image': """
+    DELETE FROM PROPERTY_GALLERY WHERE gallery_id = %(gallery_id)s
+    """,
+    'seller_portfolio': """
+    SELECT p.property_id, p.property_address, p.city, p.property_type,
+           p.price, p.status, p.created_at, p.risk_level, p.inspected_at,
+           COALESCE(g.image_count, 0) AS image_count
+    FROM PROPERTIES p
+    LEFT JOIN (
+        SELECT pg.property_id, COUNT(*) AS image_count
+        FROM PROPERTY_GALLERY pg
+        JOIN PROPERTIES sp ON sp.property_id = pg.property_id
+        WHERE sp.seller_email = %(seller_email)s
+        GROUP BY pg.property_id
+    ) g ON g.property_id = p.property_id
+    WHERE p.seller_email = %(seller_email)s
+    ORDER BY p.created_at DESC
+    """,
+}
+
+_PLACEHOLDER = re.compile(r"%\((\w+)\)s|%s|%%")
+
+
+def get_query(name):
+    """Look up a registered statement by name"""
+    return QUERIES[name]
+
+
+@lru_cache(maxsize=256)
+def compile_statement(query):
+    """
+    Rewrite pyformat placeholders as qmark bind markers
+    Cached per SQL text, so each distinct statement is parsed once
+    Returns: (qmark SQL, tuple of parameter names or None for %s positions)
+    """
+    names = []
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        names.append(match.group(1))
+        return '?'
+
+    sql = _PLACEHOLDER.sub(replace, ' '.join(query.split()))
+    return sql, tuple(names)
+
+
+def bind_statement(query, params=None):
+    """
+    Compile a statement and order its parameters for qmark binding
+    params: dict for %(name)s placeholders or a sequence for %s
+    Returns: (qmark SQL, parameter tuple)
+    """
+    sql, names = compile_statement(query)
+    if not params:
+        return sql, ()
+    if isinstance(params, dict):
+        return sql, tuple(params[name] for name in names)
+    return sql, tuple(params)
+
+
+_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=256)
+def statement_name(query):
+    """
+    Name a statement for metrics: its registry name, or verb:TABLE:hash
+    (e.g. 'select:PROPERTIES:3fa9c1') for ad-hoc SQL
+    """
+    normalized = ' '.join(query.split())
+    for name, registered in QUERIES.items():
+        if ' '.join(registered.split()) == normalized:
+            return name
+
+    verb = normalized.split(' ', 1)[0].lower() if normalized else 'query'
+    table = _TABLE.search(normalized)
+    digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:6]
+    return f"{verb}:{table.group(1).upper() if table else ''}:{digest}"
+
+
+def get_statement_cache_stats():
+    """Get hit/miss counts of the compiled statement cache"""
+    info = compile_statement.cache_info()
+    return {'hits': info.hits, 'misses': info.misses, 'size': info.currsize, 'max_size': info.maxsize}
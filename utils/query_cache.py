@@ -0,0 +1,135 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def estimate_size(value):
+    """Approximate memory held by a cached result, in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items()) + 64
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_size(item) for item in value) + 8 * len(value) + 56
+    return sys.getsizeof(value)
+
+
+class QueryCache:
+    """
+    Size-bounded LRU cache of query results with per-entry TTL
+    Entries can be tagged (e.g. with a property ID) so writes can invalidate
+    every cached read that depends on the rows they touched. Each tag has a
+    generation bumped on invalidation; a read started before a write passes
+    the generation it saw to set(), which then drops its stale result
+    Bounded by the estimated bytes of the cached results
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, tags, size)
+        self._tags = {}  # tag -> set of keys
+        self._generations = {}  # tag -> invalidation count
+        self._clears = 0
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0, 'stale_writes': 0}
+
+    @staticmethod
+    def make_key(query, params=None):
+        """Build a hashable cache key from SQL text and bound parameters"""
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        elif isinstance(params, list):
+            params = tuple(params)
+        return (' '.join(query.split()), params)
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return False, None
+
+            value, expires_at, _, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self._stats['misses'] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return True, value
+
+    def generation(self, tags=()):
+        """Snapshot of the tags' invalidation state; take it before running the query"""
+        with self._lock:
+            return (self._clears,) + tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, value, ttl, tags=(), generation=None):
+        """
+        Store a value for ttl seconds under the given invalidation tags
+        generation: snapshot from generation(tags) taken before the read; if
+        a write invalidated any of the tags since, the value is not stored
+        """
+        size = estimate_size(value)
+        with self._lock:
+            if generation is not None and generation != (self._clears,) + tuple(
+                self._generations.get(tag, 0) for tag in tags
+            ):
+                self._stats['stale_writes'] += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, time.monotonic() + ttl, tuple(tags), size)
+            self._total_bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while self._total_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags"""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self._stats['invalidations'] += 1
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._clears += 1
+            self._entries.clear()
+            self._tags.clear()
+            self._total_bytes = 0
+
+    def get_stats(self):
+        """Get hit/miss/eviction counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['bytes'] = self._total_bytes
+        return stats
+
+    def _remove(self, key):
+        _, _, tags, size = self._entries.pop(key)
+        self._total_bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
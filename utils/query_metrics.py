@@ -0,0 +1,156 @@
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger('nivaasika.queries')
+
+# Queries slower than this many milliseconds go to the slow-query log
+DEFAULT_SLOW_QUERY_MS = 500
+
+
+def param_shape(params):
+    """Describe bound parameters without their values, e.g. 'property_id' or '3 positional'"""
+    if not params:
+        return ''
+    if isinstance(params, dict):
+        return ','.join(sorted(params))
+    return f"{len(params)} positional"
+
+
+def estimate_bytes(rows):
+    """Approximate payload size of fetched rows (strings/bytes by length, other values as 8)"""
+    total = 0
+    for row in rows:
+        for value in row:
+            if isinstance(value, (str, bytes)):
+                total += len(value)
+            elif value is not None:
+                total += 8
+    return total
+
+
+_context = threading.local()
+
+
+@contextmanager
+def query_page(page):
+    """Attribute queries run on this thread to page (for worker threads)"""
+    previous = getattr(_context, 'page', None)
+    _context.page = page
+    try:
+        yield
+    finally:
+        _context.page = previous
+
+
+def calling_page():
+    """Name of the Streamlit page script on the call stack, e.g. '3_Buyer_Dashboard'"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if os.sep + 'pages' + os.sep in filename or os.path.basename(filename) == 'app.py':
+            return os.path.splitext(os.path.basename(filename))[0]
+        frame = frame.f_back
+    return getattr(_context, 'page', None)
+
+
+class QueryMetrics:
+    """
+    Per-statement query timings, row counts and fetched bytes
+    Keeps the last max_samples latencies of each statement for percentiles
+    and the last max_slow statements over slow_query_ms in a slow-query log
+    """
+
+    def __init__(self, slow_query_ms=DEFAULT_SLOW_QUERY_MS, max_samples=500, max_slow=100):
+        self.slow_query_ms = slow_query_ms
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._statements = {}  # name -> stats dict
+        self._slow = deque(maxlen=max_slow)
+
+    def record(self, name, params=None, seconds=0.0, rows=0, bytes_fetched=0, page=None, error=None):
+        """Record one executed statement"""
+        shape = param_shape(params)
+        elapsed_ms = seconds * 1000
+
+        with self._lock:
+            stats = self._statements.get(name)
+            if stats is None:
+                stats = self._statements[name] = {
+                    'calls': 0, 'errors': 0, 'rows': 0, 'bytes': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0, 'param_shape': shape,
+                    'pages': set(), 'samples': deque(maxlen=self.max_samples)
+                }
+            stats['calls'] += 1
+            stats['rows'] += rows
+            stats['bytes'] += bytes_fetched
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['samples'].append(elapsed_ms)
+            if page:
+                stats['pages'].add(page)
+            if error is not None:
+                stats['errors'] += 1
+
+            slow = elapsed_ms >= self.slow_query_ms
+            if slow:
+                self._slow.append({
+                    'at': time.time(), 'statement': name, 'param_shape': shape,
+                    'ms': round(elapsed_ms, 1), 'rows': rows, 'page': page,
+                    'error': str(error) if error is not None else None
+                })
+
+        if slow:
+            logger.warning("Slow query %s (%s) took %.0f ms, %d rows, page=%s",
+                           name, shape, elapsed_ms, rows, page)
+        if error is not None:
+            logger.error("Query %s (%s) failed on page=%s: %s", name, shape, page, error)
+
+    @staticmethod
+    def _percentile(sorted_values, pct):
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+        return sorted_values[index]
+
+    def get_summary(self):
+        """Get one row per statement with call counts and p50/p95 latency, slowest first"""
+        with self._lock:
+            snapshot = [(name, dict(stats), sorted(stats['samples'])) for name, stats in self._statements.items()]
+
+        summary = []
+        for name, stats, samples in snapshot:
+            summary.append({
+                'statement': name,
+                'calls': stats['calls'],
+                'errors': stats['errors'],
+                'p50_ms': round(self._percentile(samples, 50), 1),
+                'p95_ms': round(self._percentile(samples, 95), 1),
+                'max_ms': round(stats['max_ms'], 1),
+                'avg_rows': round(stats['rows'] / stats['calls'], 1),
+                'bytes': stats['bytes'],
+                'param_shape': stats['param_shape'],
+                'pages': ', '.join(sorted(stats['pages']))
+            })
+        summary.sort(key=lambda row: row['p95_ms'], reverse=True)
+        return summary
+
+    def get_slow_queries(self):
+        """Get the slow-query log, newest first"""
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+
+
+# Global metrics shared by every session in the process
+query_metrics = QueryMetrics(
+    slow_query_ms=float(os.getenv('NIVAASIKA_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS))
+)
@@ -1,78 +1,265 @@
+import os
 import time
-from datetime import datetime, timedelta
+import sqlite3
+import threading
+from collections import deque
 
 class RateLimiter:
     """
     Rate limiter to prevent exceeding Gemini API quotas
     Gemini Free Tier: 15 requests per minute (RPM)
+    Sliding window over a deque of monotonic timestamps: every call only
+    drops expired entries from the front, so cost is constant per request
     """
-    
-    def __init__(self, max_requests_per_minute=10):
+
+    def __init__(self, max_requests_per_minute=10, time_window=60):
         """
         Initialize rate limiter
         Set to 10 RPM to be safe (Gemini free tier allows 15 RPM)
         """
         self.max_requests = max_requests_per_minute
-        self.time_window = 60  # seconds
-        self.request_times = []  # Use instance variable instead of session state
-    
+        self.time_window = time_window  # seconds
+        self._requests = deque()  # monotonic times of requests in the window
+        self._paused_until = 0.0  # monotonic time before which no permits are given
+        self._lock = threading.Condition()
+
+    def _prune(self, now):
+        """Drop requests that have left the window (caller holds the lock)"""
+        cutoff = now - self.time_window
+        while self._requests and self._requests[0] <= cutoff:
+            self._requests.popleft()
+
+    def pause(self, seconds):
+        """Give out no permits for the next seconds (e.g. after the API answered 429)"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def try_acquire(self):
+        """Take a permit if one is free right now, without blocking"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if now >= self._paused_until and len(self._requests) < self.max_requests:
+                self._requests.append(now)
+                return True
+            return False
+
+    def acquire(self, timeout=None):
+        """
+        Block until a permit is free and take it
+        Returns: True once acquired, False if timeout seconds passed first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+                if now < self._paused_until:
+                    wait_seconds = self._paused_until - now
+                elif len(self._requests) < self.max_requests:
+                    self._requests.append(now)
+                    return True
+                else:
+                    wait_seconds = self._requests[0] + self.time_window - now
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait_seconds = min(wait_seconds, remaining)
+                self._lock.wait(wait_seconds)
+
     def can_make_request(self):
         """Check if we can make another API request"""
-        current_time = datetime.now()
-        
-        # Remove requests older than time window
-        self.request_times = [
-            req_time for req_time in self.request_times
-            if current_time - req_time < timedelta(seconds=self.time_window)
-        ]
-        
-        # Check if under limit
-        return len(self.request_times) < self.max_requests
-    
+        return self.get_remaining_requests() > 0
+
     def record_request(self):
         """Record that an API request was made"""
-        self.request_times.append(datetime.now())
-    
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            self._requests.append(now)
+
     def wait_if_needed(self):
         """
         Wait if we've hit the rate limit
         Returns: seconds waited (0 if no wait needed)
         """
-        if not self.can_make_request():
-            # Calculate wait time
-            oldest_request = min(self.request_times)
-            wait_until = oldest_request + timedelta(seconds=self.time_window)
-            wait_seconds = (wait_until - datetime.now()).total_seconds()
-            
-            if wait_seconds > 0:
-                print(f"⏳ Rate limit reached. Waiting {int(wait_seconds)} seconds...")
-                time.sleep(wait_seconds + 1)  # Add 1 second buffer
-                return wait_seconds
-        
-        return 0
-    
+        wait_seconds = self.get_reset_time()
+        if self.can_make_request() or wait_seconds <= 0:
+            return 0
+
+        print(f"⏳ Rate limit reached. Waiting {int(wait_seconds)} seconds...")
+        time.sleep(wait_seconds)
+        return wait_seconds
+
     def get_remaining_requests(self):
         """Get number of requests remaining in current window"""
-        current_time = datetime.now()
-        
-        # Clean old requests
-        self.request_times = [
-            req_time for req_time in self.request_times
-            if current_time - req_time < timedelta(seconds=self.time_window)
-        ]
-        
-        return self.max_requests - len(self.request_times)
-    
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            if now < self._paused_until:
+                return 0
+            return self.max_requests - len(self._requests)
+
     def get_reset_time(self):
-        """Get time until rate limit resets"""
-        if not self.request_times:
+        """Get time until the oldest request leaves the window"""
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            pause_seconds = max(0, self._paused_until - now)
+            if not self._requests:
+                return pause_seconds
+            return max(pause_seconds, self._requests[0] + self.time_window - now)
+
+class SharedRateLimiter(RateLimiter):
+    """
+    Sliding-window rate limiter shared by every process on the host
+    Request times live in a SQLite file; BEGIN IMMEDIATE serializes the
+    check-and-record step across processes, so N Streamlit servers
+    together stay under one quota
+    """
+
+    # Upper bound on a single sleep while polling for a free slot
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, db_path, name='gemini', max_requests_per_minute=10, time_window=60):
+        super().__init__(max_requests_per_minute, time_window)
+        self.db_path = db_path
+        self.name = name
+        self._local = threading.local()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_requests (limiter TEXT NOT NULL, requested_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_rate_limit_requests ON rate_limit_requests (limiter, requested_at)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_pauses (limiter TEXT PRIMARY KEY, paused_until REAL NOT NULL)"
+        )
+
+    def _connection(self):
+        """One autocommit connection per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _paused_for(self, conn, now):
+        """Seconds left of a pause set by any process (0 if none)"""
+        row = conn.execute(
+            "SELECT paused_until FROM rate_limit_pauses WHERE limiter = ?", (self.name,)
+        ).fetchone()
+        return max(0, row[0] - now) if row else 0
+
+    def _window(self, conn, now):
+        """Prune expired rows; returns (count, oldest) for the window"""
+        conn.execute(
+            "DELETE FROM rate_limit_requests WHERE limiter = ? AND requested_at <= ?",
+            (self.name, now - self.time_window)
+        )
+        return conn.execute(
+            "SELECT COUNT(*), MIN(requested_at) FROM rate_limit_requests WHERE limiter = ?",
+            (self.name,)
+        ).fetchone()
+
+    def _try_acquire(self):
+        """Returns (acquired, seconds until a permit may be free)"""
+        conn = self._connection()
+        # Wall clock, since monotonic clocks are not comparable across processes
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            paused_for = self._paused_for(conn, now)
+            count, oldest = self._window(conn, now)
+            if not paused_for and count < self.max_requests:
+                conn.execute(
+                    "INSERT INTO rate_limit_requests (limiter, requested_at) VALUES (?, ?)",
+                    (self.name, now)
+                )
+                acquired = True
+            else:
+                acquired = False
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if acquired:
+            return True, 0
+        wait_seconds = paused_for if oldest is None else max(paused_for, oldest + self.time_window - now)
+        return False, max(0, wait_seconds)
+
+    def try_acquire(self):
+        acquired, _ = self._try_acquire()
+        return acquired
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            acquired, wait_seconds = self._try_acquire()
+            if acquired:
+                return True
+
+            # Other processes may free or take slots, so poll instead of one long sleep
+            wait_seconds = min(max(wait_seconds, 0.01), self.POLL_INTERVAL)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_seconds = min(wait_seconds, remaining)
+            time.sleep(wait_seconds)
+
+    def pause(self, seconds):
+        self._connection().execute(
+            """
+            INSERT INTO rate_limit_pauses (limiter, paused_until) VALUES (?, ?)
+            ON CONFLICT (limiter) DO UPDATE SET paused_until = MAX(paused_until, excluded.paused_until)
+            """,
+            (self.name, time.time() + seconds)
+        )
+
+    def record_request(self):
+        self._connection().execute(
+            "INSERT INTO rate_limit_requests (limiter, requested_at) VALUES (?, ?)",
+            (self.name, time.time())
+        )
+
+    def get_remaining_requests(self):
+        conn = self._connection()
+        now = time.time()
+        if self._paused_for(conn, now):
             return 0
-        
-        oldest_request = min(self.request_times)
-        reset_time = oldest_request + timedelta(seconds=self.time_window)
-        seconds_until_reset = (reset_time - datetime.now()).total_seconds()
-        
-        return max(0, seconds_until_reset)
+        count, _ = self._window(conn, now)
+        return self.max_requests - count
+
+    def get_reset_time(self):
+        conn = self._connection()
+        now = time.time()
+        paused_for = self._paused_for(conn, now)
+        _, oldest = self._window(conn, now)
+        if oldest is None:
+            return paused_for
+        return max(paused_for, oldest + self.time_window - now)
+
+def create_rate_limiter(max_requests_per_minute=10):
+    """
+    Build the Gemini rate limiter
+    Set GEMINI_RATE_LIMIT_DB to a SQLite path to share the quota between
+    processes; otherwise the limit is per process
+    """
+    db_path = os.getenv('GEMINI_RATE_LIMIT_DB')
+    if db_path:
+        return SharedRateLimiter(db_path, max_requests_per_minute=max_requests_per_minute)
+    return RateLimiter(max_requests_per_minute=max_requests_per_minute)
 
 # Global rate limiter instance
-gemini_rate_limiter = RateLimiter(max_requests_per_minute=10)
\ No newline at end of file
+gemini_rate_limiter = create_rate_limiter(max_requests_per_minute=10)
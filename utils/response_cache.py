@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# Default location for cached Gemini responses
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'gemini')
+
+
+class ResponseCache:
+    """
+    Persistent on-disk cache for parsed AI responses
+    Values are stored as JSON files; once the directory grows past max_bytes
+    the least recently used entries are evicted
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._scan())
+
+    @staticmethod
+    def make_key(*parts):
+        """Hash key parts (strings) into a filename-safe cache key"""
+        return hashlib.sha256('\x1f'.join(str(p) for p in parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _scan(self):
+        """Yield (path, last access time, size) for every cache file"""
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            yield path, stat.st_mtime, stat.st_size
+
+    def _read(self, key):
+        """Read an entry without counting it; call with the lock held"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False, None
+
+        # Touch the file so eviction treats it as recently used
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return True, value
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss"""
+        return self.get_first([key])
+
+    def get_first(self, keys):
+        """
+        Look up several keys for the same value, in order, as one lookup
+        Counts a single hit or miss, so alternative keys do not skew the hit rate
+        Returns: (True, value) for the first key found, (False, None) otherwise
+        """
+        with self._lock:
+            for key in keys:
+                hit, value = self._read(key)
+                if hit:
+                    self._stats['hits'] += 1
+                    return True, value
+            self._stats['misses'] += 1
+            return False, None
+
+    def set(self, key, value):
+        """Store a JSON-serializable value and evict old entries if over budget"""
+        path = self._path(key)
+        payload = json.dumps(value).encode('utf-8')
+
+        with self._lock:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+
+            self._total_bytes += len(payload) - old_size
+            self._stats['writes'] += 1
+
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used files until the cache fits in max_bytes"""
+        entries = sorted(self._scan(), key=lambda entry: entry[1])
+        self._total_bytes = sum(size for _, _, size in entries)
+
+        for path, _, size in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._total_bytes -= size
+            self._stats['evictions'] += 1
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            for path, _, _ in list(self._scan()):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._total_bytes = 0
+
+    def get_stats(self):
+        """Get hit/miss counters and current size on disk"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size_bytes'] = self._total_bytes
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# Global cache for parsed Gemini defect lists
+gemini_response_cache = ResponseCache(
+    directory=os.getenv('NIVAASIKA_CACHE_DIR', DEFAULT_CACHE_DIR),
+    max_bytes=int(os.getenv('NIVAASIKA_CACHE_MAX_BYTES', 50 * 1024 * 1024))
+)
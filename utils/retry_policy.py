@@ -0,0 +1,169 @@
+import os
+import random
+import re
+import threading
+import time
+
+from google.api_core import exceptions as api_exceptions
+
+from utils.rate_limiter import gemini_rate_limiter
+
+# HTTP statuses worth retrying: quota (429) and transient server errors
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Dropped connections and timeouts raised by the REST transport's requests
+# session, matched by class so requests is not imported here
+RETRYABLE_REQUESTS_ERRORS = ('requests.exceptions.ConnectionError', 'requests.exceptions.Timeout')
+
+_RETRY_IN = re.compile(r"retry in ([\d.]+)\s*s", re.IGNORECASE)
+
+
+class RateLimitTimeout(Exception):
+    """Raised when no rate-limit permit frees up before the retry deadline"""
+
+
+def status_code(error):
+    """HTTP status of an API error, or None"""
+    code = getattr(error, 'code', None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error):
+    """True for 429s, 5xx and dropped connections; bad requests and bad JSON are not retried"""
+    if isinstance(error, api_exceptions.GoogleAPICallError):
+        return status_code(error) in RETRYABLE_STATUS_CODES
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    return any(
+        f"{cls.__module__}.{cls.__qualname__}" in RETRYABLE_REQUESTS_ERRORS for cls in type(error).__mro__
+    )
+
+
+def retry_after_seconds(error):
+    """
+    Server's hint of how long to wait, or None
+    Checks RetryInfo details (gRPC objects or REST dicts), a Retry-After
+    header, then 'Please retry in 13.5s' in the message
+    """
+    for detail in getattr(error, 'details', None) or []:
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+        if isinstance(detail, dict) and 'retryDelay' in detail:
+            try:
+                return float(str(detail['retryDelay']).rstrip('s'))
+            except ValueError:
+                pass
+
+    response = getattr(error, 'response', None)
+    header = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+
+    match = _RETRY_IN.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+class RetryPolicy:
+    """
+    Retries transient API errors with capped exponential backoff
+    Retry n waits a random time up to min(max_delay, base_delay * 2**(n-1))
+    (full jitter, so parallel workers do not retry in lockstep), or exactly
+    the server's retry-after hint when it gives one. Gives up after
+    max_attempts or once the next wait would pass the deadline. Each attempt
+    first takes a permit from rate_limiter, waiting at most the time left
+    before the deadline; 429s pause the rate limiter for the whole wait so
+    other callers hold off too
+    """
+
+    def __init__(self, max_attempts=5, base_delay=1.0, max_delay=30.0, deadline=120.0, rate_limiter=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.rate_limiter = rate_limiter
+        self._lock = threading.Lock()
+        self._stats = {'calls': 0, 'retries': 0, 'throttled': 0, 'gave_up': 0, 'wait_seconds': 0.0}
+
+    def backoff(self, attempt, error=None):
+        """Seconds to wait before retry number attempt (1-based)"""
+        hint = retry_after_seconds(error) if error is not None else None
+        if hint is not None:
+            # Retrying before the server's hint only earns another 429; call()
+            # gives up instead when the hint runs past the deadline
+            return hint
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Run fn, retrying transient errors; re-raises the last error on giving
+        up, or raises RateLimitTimeout if no permit frees up in time
+        """
+        started = time.monotonic()
+        self._count('calls')
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0 or not self.rate_limiter.acquire(timeout=remaining):
+                    self._count('gave_up')
+                    raise RateLimitTimeout(f"No rate-limit permit within the {self.deadline:g}s retry deadline")
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+
+                wait_seconds = self.backoff(attempt, e)
+                if status_code(e) == 429:
+                    self._count('throttled')
+                    if self.rate_limiter is not None:
+                        self.rate_limiter.pause(wait_seconds)
+
+                elapsed = time.monotonic() - started
+                if attempt >= self.max_attempts or elapsed + wait_seconds > self.deadline:
+                    self._count('gave_up')
+                    raise
+
+                self._count('retries')
+                self._count('wait_seconds', wait_seconds)
+                time.sleep(wait_seconds)
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get_stats(self):
+        """Get call, retry, 429, give-up counts and total seconds spent waiting"""
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+def create_retry_policy(rate_limiter=None):
+    """
+    Build the Gemini retry policy
+    GEMINI_RETRY_MAX_ATTEMPTS and GEMINI_RETRY_DEADLINE_SECONDS override the
+    attempt budget and total deadline
+    """
+    return RetryPolicy(
+        max_attempts=int(os.getenv('GEMINI_RETRY_MAX_ATTEMPTS', 5)),
+        deadline=float(os.getenv('GEMINI_RETRY_DEADLINE_SECONDS', 120)),
+        rate_limiter=rate_limiter
+    )
+
+
+# Global retry policy for Gemini requests
+gemini_retry_policy = create_retry_policy(gemini_rate_limiter)